@@ -0,0 +1,61 @@
+"""Compares two benchmark result files and flags regressions.
+
+    python -m benchmarks.compare benchmarks/results/<base>.json benchmarks/results/<head>.json --threshold 10
+
+Exits non-zero when any latency, startup or memory metric grows, or any
+throughput drops, by more than the threshold percentage.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Optional
+
+# Metric name suffixes where a larger value is worse; throughput is the opposite
+HIGHER_IS_WORSE = ("latencyMs.p50", "latencyMs.p95", "latencyMs.p99", "startupSeconds", "freshSeconds", "drainSeconds", "memory.rssMb", "memory.peakRssMb", "upstream.calls")
+LOWER_IS_WORSE = ("throughputRps",)
+
+
+def flatten(node, prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            flat.update(flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        flat[prefix] = float(node)
+    return flat
+
+
+def direction(metric: str) -> Optional[int]:
+    if metric.endswith(HIGHER_IS_WORSE):
+        return 1
+    if metric.endswith(LOWER_IS_WORSE):
+        return -1
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change that counts as a regression")
+    args = parser.parse_args()
+    with open(args.base) as base_file, open(args.head) as head_file:
+        base, head = json.load(base_file), json.load(head_file)
+
+    base_metrics, head_metrics = flatten(base["scenarios"]), flatten(head["scenarios"])
+    print(f"{base['meta'].get('commit')} -> {head['meta'].get('commit')}")
+    regressions = 0
+    for metric in sorted(set(base_metrics) & set(head_metrics)):
+        sign = direction(metric)
+        if sign is None:
+            continue
+        before, after = base_metrics[metric], head_metrics[metric]
+        change = (after - before) / before * 100 if before else 0.0
+        regressed = change * sign > args.threshold
+        regressions += regressed
+        print(f"{'REGRESSION ' if regressed else '           '}{metric:<55} {before:>12.2f} {after:>12.2f} {change:>+8.1f}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
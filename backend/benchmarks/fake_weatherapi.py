@@ -0,0 +1,176 @@
+"""Local WeatherAPI.com stand-in for benchmarks.
+
+Serves /forecast.json and /marine.json with the same shape as the real API,
+with configurable latency, error rate and rate limit, and counts every call.
+
+    python -m benchmarks.fake_weatherapi --port 9100 --latency-ms 80 --error-rate 0.02 --rate-limit 50
+"""
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import random
+import time
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+HOURS = 24
+
+
+class FakeConfig:
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 20.0, error_rate: float = 0.0, rate_limit: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        # Requests/second across all endpoints; 0 disables the limit
+        self.rate_limit = rate_limit
+
+
+def seed_for(query: str) -> int:
+    return int.from_bytes(hashlib.blake2b(query.encode(), digest_size=4).digest(), "big")
+
+
+def forecast_payload(query: str, days: int, now: float) -> dict:
+    rng = random.Random(seed_for(query) ^ int(now // 3600))
+    base_wind = rng.uniform(5, 40)
+    start = int(now - now % 86400)
+    forecastday = []
+    for d in range(days):
+        day_start = start + d * 86400
+        hours = [
+            {
+                "time_epoch": day_start + h * 3600,
+                "temp_c": round(rng.uniform(24, 33), 1),
+                "wind_kph": round(max(0.0, base_wind + rng.gauss(0, 8)), 1),
+                "wind_degree": rng.randrange(360),
+                "pressure_mb": rng.randrange(1000, 1016),
+                "humidity": rng.randrange(55, 95),
+                "cloud": rng.randrange(100),
+                "chance_of_rain": rng.randrange(100),
+                "vis_km": 10.0,
+                "gust_kph": round(base_wind * 1.4, 1),
+                "condition": {"text": "Partly cloudy", "icon": "//cdn.weatherapi.com/weather/64x64/day/116.png", "code": 1003},
+            }
+            for h in range(HOURS)
+        ]
+        forecastday.append({
+            "date": time.strftime("%Y-%m-%d", time.gmtime(day_start)),
+            "date_epoch": day_start,
+            "day": {
+                "maxtemp_c": max(hour["temp_c"] for hour in hours),
+                "mintemp_c": min(hour["temp_c"] for hour in hours),
+                "maxwind_kph": max(hour["wind_kph"] for hour in hours),
+                "daily_chance_of_rain": rng.randrange(100),
+                "condition": {"text": "Partly cloudy", "icon": "//cdn.weatherapi.com/weather/64x64/day/116.png", "code": 1003},
+            },
+            "astro": {"sunrise": "06:12 AM", "sunset": "06:31 PM"},
+            "hour": hours,
+        })
+    current = forecastday[0]["hour"][min(HOURS - 1, int(now % 86400 // 3600))]
+    return {
+        "location": {"name": query, "tz_id": "Asia/Kolkata", "localtime_epoch": int(now)},
+        "current": {**current, "air_quality": {"us-epa-index": rng.randrange(1, 4)}},
+        "forecast": {"forecastday": forecastday},
+        "alerts": {"alert": []},
+    }
+
+
+def marine_payload(query: str, days: int, now: float) -> dict:
+    rng = random.Random(seed_for(query) ^ int(now // 3600) ^ 0x5A5A)
+    base_wave = rng.uniform(0.5, 3.5)
+    start = int(now - now % 86400)
+    forecastday = []
+    for d in range(days):
+        day_start = start + d * 86400
+        forecastday.append({
+            "date": time.strftime("%Y-%m-%d", time.gmtime(day_start)),
+            "hour": [
+                {
+                    "time_epoch": day_start + h * 3600,
+                    "sig_ht_mt": round(max(0.1, base_wave + rng.gauss(0, 0.4)), 1),
+                    "swell_ht_mt": round(base_wave * 0.7, 1),
+                    "swell_dir": rng.randrange(360),
+                    "swell_period_secs": round(rng.uniform(5, 14), 1),
+                    "water_temp_c": round(rng.uniform(26, 30), 1),
+                    "wind_kph": round(rng.uniform(5, 40), 1),
+                }
+                for h in range(HOURS)
+            ],
+        })
+    return {"location": {"name": query}, "forecast": {"forecastday": forecastday}}
+
+
+@functools.lru_cache(maxsize=8192)
+def encoded_payload(kind: str, query: str, days: int, hour: int) -> bytes:
+    """Payloads change hourly, like the real API; caching keeps the fake's own CPU cost out of the numbers."""
+    build = forecast_payload if kind == "forecast" else marine_payload
+    return json.dumps(build(query, days, hour * 3600.0)).encode()
+
+
+def create_app(config: FakeConfig) -> FastAPI:
+    app = FastAPI(title="Fake WeatherAPI")
+    stats: Dict[str, int] = {"calls": 0, "errors": 0, "rateLimited": 0}
+    bucket = {"tokens": config.rate_limit, "updated": time.monotonic()}
+
+    def rate_limited() -> bool:
+        if config.rate_limit <= 0:
+            return False
+        now = time.monotonic()
+        bucket["tokens"] = min(config.rate_limit, bucket["tokens"] + (now - bucket["updated"]) * config.rate_limit)
+        bucket["updated"] = now
+        if bucket["tokens"] < 1:
+            return True
+        bucket["tokens"] -= 1
+        return False
+
+    async def respond(request: Request, kind: str):
+        stats["calls"] += 1
+        stats[request.url.path] = stats.get(request.url.path, 0) + 1
+        if rate_limited():
+            stats["rateLimited"] += 1
+            return JSONResponse({"error": {"code": 2007, "message": "API key has exceeded calls per second."}}, status_code=429, headers={"Retry-After": "1"})
+        delay = max(0.0, config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if random.random() < config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"code": 9999, "message": "Internal application error."}}, status_code=502)
+        params = request.query_params
+        body = encoded_payload(kind, params.get("q", ""), int(params.get("days", "1")), int(time.time() // 3600))
+        return Response(content=body, media_type="application/json")
+
+    @app.get("/forecast.json")
+    async def forecast(request: Request):
+        return await respond(request, "forecast")
+
+    @app.get("/marine.json")
+    async def marine(request: Request):
+        return await respond(request, "marine")
+
+    @app.get("/_stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/_reset")
+    async def reset():
+        for key in list(stats):
+            stats[key] = 0
+        return stats
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests/second, 0 = unlimited")
+    args = parser.parse_args()
+    config = FakeConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,348 @@
+"""Load scenarios against a local API instance backed by the fake WeatherAPI.
+
+Run from backend/:
+
+    python -m benchmarks.run                                  # every scenario
+    python -m benchmarks.run --scenarios polling,sos_burst --duration 20
+    python -m benchmarks.run --counts 64,500,2000 --scenarios scaling
+    python -m benchmarks.run --workers 4 --scenarios cold_start,polling
+    python -m benchmarks.compare results/base.json results/head.json
+
+The API runs in its own process against the fake upstream. Storage is the app's
+in-memory fallback unless --mongo-url points at a real (local) MongoDB. With
+--workers above 1 the API runs that many uvicorn workers sharing one refresher
+through the local shared cache. Results
+go to benchmarks/results/<utc time>-<commit>.json.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+SCENARIOS = ("cold_start", "polling", "sos_burst", "scaling")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def child_pids(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
+
+
+def memory_mb(pid: int) -> Dict[str, Optional[float]]:
+    """Resident and peak resident memory of a process and its workers, summed (Linux only)."""
+    usage: Dict[str, Optional[float]] = {"rssMb": None, "peakRssMb": None}
+    for process_id in [pid] + child_pids(pid):
+        try:
+            with open(f"/proc/{process_id}/status") as status:
+                for line in status:
+                    key = "rssMb" if line.startswith("VmRSS:") else "peakRssMb" if line.startswith("VmHWM:") else None
+                    if key:
+                        usage[key] = round((usage[key] or 0.0) + int(line.split()[1]) / 1024, 1)
+        except OSError:
+            pass
+    return usage
+
+
+def summarize(latencies: List[float], elapsed: float, statuses: Dict[int, int]) -> dict:
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if values.size else (None, None, None)
+    return {
+        "requests": len(latencies),
+        "throughputRps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latencyMs": {
+            "p50": round(float(p50), 2) if p50 is not None else None,
+            "p95": round(float(p95), 2) if p95 is not None else None,
+            "p99": round(float(p99), 2) if p99 is not None else None,
+            "max": round(float(values.max()), 2) if values.size else None,
+        },
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+@contextmanager
+def process(module: str, args: List[str], env: dict, log_name: str):
+    """Runs `python -m module`, logging to a temp file that is echoed if the process misbehaves."""
+    log = tempfile.NamedTemporaryFile(prefix=f"{log_name}-", suffix=".log", delete=False)
+    proc = subprocess.Popen([sys.executable, "-m", module, *args], cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        yield proc
+    except Exception:
+        log.flush()
+        with open(log.name) as output:
+            sys.stderr.write(f"--- {log_name} log ---\n{output.read()[-4000:]}\n")
+        raise
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        log.close()
+        os.unlink(log.name)
+
+
+async def wait_ready(url: str, proc: subprocess.Popen, timeout: float) -> float:
+    """Seconds until `url` answers 200; the API only serves once startup has finished."""
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"process exited with {proc.returncode} before becoming ready")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.02)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.fake_url = f"http://127.0.0.1:{free_port()}"
+        self.workdir = tempfile.gettempdir()
+
+    def fake_args(self) -> List[str]:
+        a = self.args
+        return [
+            "--port", self.fake_url.rsplit(":", 1)[1],
+            "--latency-ms", str(a.upstream_latency_ms),
+            "--jitter-ms", str(a.upstream_jitter_ms),
+            "--error-rate", str(a.upstream_error_rate),
+            "--rate-limit", str(a.upstream_rate_limit),
+        ]
+
+    def api_env(self, count: int, snapshot_path: str) -> dict:
+        a = self.args
+        env = dict(os.environ)
+        env.update({
+            "WEATHER_API_URL": self.fake_url,
+            "WEATHER_API_KEY": "bench",
+            "MONGO_URL": a.mongo_url or "mongodb://127.0.0.1:1",
+            "MONGO_TIMEOUT_MS": "2000" if a.mongo_url else "50",
+            "REFRESH_TTL_SECONDS": str(a.refresh_ttl),
+            "BENCH_LOCATION_COUNT": str(count),
+            "SNAPSHOT_PATH": snapshot_path,
+            "PYTHONUNBUFFERED": "1",
+        })
+        if a.workers > 1:
+            env["SHARED_CACHE"] = "local"
+            env["SHARED_CACHE_PATH"] = f"{snapshot_path}.shared"
+        if a.client_rate is not None:
+            # The app's own WeatherAPI token bucket dominates cold start at the default 10/s
+            env["WEATHER_API_RATE"] = str(a.client_rate)
+            env["WEATHER_API_BURST"] = str(max(1, int(a.client_rate)))
+        return env
+
+    async def upstream_stats(self, reset: bool = False) -> dict:
+        async with httpx.AsyncClient(base_url=self.fake_url) as client:
+            response = await (client.post("/_reset") if reset else client.get("/_stats"))
+            return response.json()
+
+    @asynccontextmanager
+    async def api(self, count: int, snapshot_path: Optional[str] = None):
+        """Runs the API with `count` locations; yields (process, base url, startup seconds).
+
+        Without `snapshot_path` the API starts cold, from a snapshot file that does not exist yet.
+        """
+        port = free_port()
+        base = f"http://127.0.0.1:{port}"
+        snapshot_path = snapshot_path or os.path.join(self.workdir, f"snapshot-{port}")
+        await self.upstream_stats(reset=True)
+        with process("benchmarks.serve", ["--port", str(port), "--workers", str(self.args.workers)], self.api_env(count, snapshot_path), "api") as proc:
+            startup = await wait_ready(f"{base}/api/locations?view=summary", proc, self.args.startup_timeout)
+            yield proc, base, startup
+
+    async def load(self, base: str, paths: List[str], duration: float, concurrency: int) -> dict:
+        latencies: List[float] = []
+        statuses: Dict[int, int] = {}
+        deadline = time.perf_counter() + duration
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30.0, headers={"Accept-Encoding": "gzip"}) as client:
+            async def worker(seed: int):
+                rng = random.Random(seed)
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    response = await client.get(rng.choice(paths))
+                    latencies.append(time.perf_counter() - started)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(i) for i in range(concurrency)))
+            return summarize(latencies, time.perf_counter() - started, statuses)
+
+    async def cold_start(self) -> dict:
+        snapshot_path = os.path.join(self.workdir, "cold-start-snapshot")
+        results = {}
+        # First boot has no snapshot; the restart reuses the one written at the first shutdown
+        for phase in ("cold", "restart"):
+            async with self.api(self.args.locations, snapshot_path) as (proc, base, startup):
+                ready_upstream = await self.upstream_stats()
+                # The API serves its snapshot first; time how long until every location has live data
+                started = time.perf_counter() - startup
+                async with httpx.AsyncClient(base_url=base) as client:
+                    while True:
+                        locations = (await client.get("/api/locations?view=summary")).json()
+                        fresh = time.perf_counter() - started
+                        if not any(loc["stale"] for loc in locations) or fresh > self.args.startup_timeout:
+                            break
+                        await asyncio.sleep(0.05)
+                results[phase] = {
+                    "locations": len(locations),
+                    "startupSeconds": round(startup, 3),
+                    "freshSeconds": round(fresh, 3),
+                    "upstreamBeforeReady": ready_upstream,
+                    "upstream": await self.upstream_stats(),
+                    "memory": memory_mb(proc.pid),
+                }
+        return results
+
+    async def polling(self) -> dict:
+        async with self.api(self.args.locations) as (proc, base, _):
+            async with httpx.AsyncClient(base_url=base) as client:
+                ids = [loc["id"] for loc in (await client.get("/api/locations?view=summary")).json()]
+            await self.upstream_stats(reset=True)
+            paths = ["/api/locations", "/api/locations?view=summary"] + [f"/api/locations/{location_id}" for location_id in ids[:20]]
+            result = await self.load(base, paths, self.args.duration, self.args.concurrency)
+            result.update({"locations": len(ids), "concurrency": self.args.concurrency, "upstream": await self.upstream_stats(), "memory": memory_mb(proc.pid)})
+            return result
+
+    async def sos_burst(self) -> dict:
+        async with self.api(self.args.locations) as (proc, base, _):
+            latencies: List[float] = []
+            statuses: Dict[int, int] = {}
+            alerts = iter(range(self.args.sos_count))
+            async with httpx.AsyncClient(base_url=base, timeout=30.0, limits=httpx.Limits(max_connections=self.args.concurrency)) as client:
+                async def worker():
+                    for i in alerts:
+                        alert = {
+                            "contactNumber": f"+91{9000000000 + i}",
+                            "lat": 8.0 + (i % 100) * 0.1,
+                            "lng": 76.0 + (i % 37) * 0.1,
+                            "message": "Engine failure, need assistance",
+                        }
+                        started = time.perf_counter()
+                        response = await client.post("/api/sos", json=alert, headers={"Idempotency-Key": f"bench-{i}"})
+                        latencies.append(time.perf_counter() - started)
+                        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+                started = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+                result = summarize(latencies, time.perf_counter() - started, statuses)
+
+                # Time until every alert is persisted and notified
+                while time.perf_counter() - started < self.args.startup_timeout:
+                    stats = (await client.get("/api/sos/stats")).json()
+                    if not stats["pendingWrites"] and not stats["pendingNotifications"] and stats["dispatched"] + stats["failed"] >= stats["received"]:
+                        break
+                    await asyncio.sleep(0.05)
+                result.update({"drainSeconds": round(time.perf_counter() - started, 3), "pipeline": stats, "memory": memory_mb(proc.pid)})
+            return result
+
+    async def scaling(self) -> dict:
+        results = {}
+        lat, lng = 15.0, 73.5
+        paths = [
+            "/api/locations?view=summary",
+            f"/api/locations/nearest?lat={lat}&lng={lng}&k=5",
+            f"/api/locations/bbox?minLat={lat - 2}&minLng={lng - 2}&maxLat={lat + 2}&maxLng={lng + 2}&view=summary",
+        ]
+        for count in self.args.counts:
+            async with self.api(count) as (proc, base, startup):
+                startup_upstream = await self.upstream_stats()
+                result = await self.load(base, paths, max(2.0, self.args.duration / 2), self.args.concurrency)
+                result.update({"startupSeconds": round(startup, 3), "upstream": startup_upstream, "memory": memory_mb(proc.pid)})
+                results[str(count)] = result
+        return results
+
+    async def run(self, scenarios: List[str]) -> dict:
+        results = {}
+        with tempfile.TemporaryDirectory(prefix="marine-bench-") as self.workdir, process("benchmarks.fake_weatherapi", self.fake_args(), dict(os.environ), "fake-weatherapi") as fake:
+            await wait_ready(f"{self.fake_url}/_stats", fake, 30.0)
+            for name in scenarios:
+                print(f"running {name}...", flush=True)
+                results[name] = await getattr(self, name)()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--locations", type=int, default=0, help="location count for non-scaling scenarios (0 = the built-in list)")
+    parser.add_argument("--counts", default="0,500,2000", help="location counts for the scaling scenario")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per polling run")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--sos-count", type=int, default=2000)
+    parser.add_argument("--refresh-ttl", type=float, default=900.0, help="REFRESH_TTL_SECONDS for the API under test")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50.0)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-rate-limit", type=float, default=0.0, help="fake WeatherAPI requests/second, 0 = unlimited")
+    parser.add_argument("--client-rate", type=float, default=None, help="override the API's WEATHER_API_RATE (requests/second)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the API under test")
+    parser.add_argument("--mongo-url", default=None, help="benchmark against a real MongoDB instead of the in-memory fallback")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--output", default=None, help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+    args.counts = [int(count) for count in args.counts.split(",") if count]
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(Bench(args).run(scenarios))
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "scenarios": results,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{commit or 'unknown'}.json")
+    with open(output, "w") as results_file:
+        json.dump(report, results_file, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Runs the API for a benchmark, padded with synthetic harbors up to BENCH_LOCATION_COUNT.
+
+    BENCH_LOCATION_COUNT=2000 WEATHER_API_URL=http://127.0.0.1:9100 python -m benchmarks.serve --port 8100
+"""
+import argparse
+import csv
+import os
+import tempfile
+
+import uvicorn
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def padded_registry(count: int) -> str:
+    """Writes a copy of the registry with the real harbors repeated, nudged offshore, up to `count` rows."""
+    with open(os.path.join(BACKEND_DIR, "data", "locations.csv"), newline="") as source:
+        reader = csv.DictReader(source)
+        fields, originals = reader.fieldnames, list(reader)
+    rows = list(originals)
+    n = 0
+    while len(rows) < count:
+        site = originals[n % len(originals)]
+        ring = n // len(originals) + 1
+        rows.append({
+            **site,
+            "id": f"{site['id']}-{ring}",
+            "name": f"{site['name']} #{ring}",
+            "lat": round(float(site["lat"]) + ((ring * 37) % 100 - 50) / 100, 4),
+            "lng": round(float(site["lng"]) + ((ring * 61) % 100 - 50) / 100, 4),
+        })
+        n += 1
+    handle, path = tempfile.mkstemp(prefix="bench-locations-", suffix=".csv")
+    with os.fdopen(handle, "w", newline="") as padded:
+        writer = csv.DictWriter(padded, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    count = int(os.getenv("BENCH_LOCATION_COUNT", "0"))
+    if count:
+        os.environ["LOCATIONS_FILE"] = padded_registry(count)
+    if args.workers > 1:
+        # Workers import the app themselves and inherit LOCATIONS_FILE from the environment
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
+    else:
+        # Imported late so it picks up LOCATIONS_FILE
+        import main
+        uvicorn.run(main.app, host=args.host, port=args.port, log_level="warning")
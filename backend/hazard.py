@@ -0,0 +1,312 @@
+import asyncio
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from history import STATUS_CODES
+from spatial import KM_PER_DEGREE
+
+# (min_lat, min_lng, max_lat, max_lng) covering the Indian coastline and island territories
+INDIA_BOUNDS = (5.5, 67.5, 24.5, 94.5)
+NO_DATA = 255
+TILE_CELLS = 64
+HOUR = 3600
+
+
+def classify(wave: np.ndarray, wind: np.ndarray, caution: Tuple[float, float], do_not_go: Tuple[float, float]) -> np.ndarray:
+    """Vectorized get_safety_status: index into STATUS_CODES per cell, NO_DATA where unknown."""
+    codes = np.zeros(wave.shape, dtype=np.uint8)
+    codes[(wave > caution[0]) | (wind > caution[1])] = 1
+    codes[(wave > do_not_go[0]) | (wind > do_not_go[1])] = 2
+    codes[np.isnan(wave) | np.isnan(wind)] = NO_DATA
+    return codes
+
+
+class HazardField:
+    """Wave/wind grid interpolated from harbor telemetry, classified cell by cell.
+
+    Each cell is an inverse-distance weighted blend of its `neighbors` nearest
+    harbors; cells farther than `max_km` from any harbor have no data. The
+    neighbor weights are computed once per set of harbor positions, after which a
+    telemetry change only updates the cells that harbor contributes to. The same
+    weights blend the harbors' hourly forecasts for points at a future time.
+    """
+
+    def __init__(
+        self,
+        caution: Tuple[float, float],
+        do_not_go: Tuple[float, float],
+        bounds: Tuple[float, float, float, float] = INDIA_BOUNDS,
+        resolution: float = 0.05,
+        neighbors: int = 8,
+        power: float = 2.0,
+        max_km: float = 300.0,
+    ):
+        self.caution = caution
+        self.do_not_go = do_not_go
+        self.bounds = bounds
+        self.resolution = resolution
+        self.neighbors = neighbors
+        self.power = power
+        self.max_km = max_km
+        min_lat, min_lng, max_lat, max_lng = bounds
+        self.rows = int(round((max_lat - min_lat) / resolution))
+        self.cols = int(round((max_lng - min_lng) / resolution))
+        self.positions: Dict[str, Tuple[float, float]] = {}
+        self.values: Dict[str, Tuple[float, float]] = {}
+        # Per harbor: (first hour epoch, hourly wave, hourly wind)
+        self.hourly: Dict[str, Tuple[int, np.ndarray, np.ndarray]] = {}
+        self.version = 0
+        self._dirty = True
+        self._lock: Optional[asyncio.Lock] = None
+        self._slot: Dict[str, int] = {}
+        self._idx = np.zeros((0, 1), dtype=np.int32)
+        self._weights = np.zeros((0, 1), dtype=np.float32)
+        self._forecast: Optional[Tuple[int, np.ndarray, np.ndarray]] = None
+        self.wave = np.full(self.rows * self.cols, np.nan)
+        self.wind = np.full(self.rows * self.cols, np.nan)
+        self.classes = np.full(self.rows * self.cols, NO_DATA, dtype=np.uint8)
+
+    def update(self, loc: dict):
+        """Feeds one harbor's latest telemetry into the field."""
+        position = (float(loc["lat"]), float(loc["lng"]))
+        value = (float(loc.get("waveHeight") or 0.0), float(loc.get("windSpeed") or 0.0))
+        previous = self.values.get(loc["id"])
+        self.values[loc["id"]] = value
+        if self.positions.get(loc["id"]) != position:
+            self.positions[loc["id"]] = position
+            self._dirty = True
+        elif not self._dirty and previous != value:
+            self._apply_delta(loc["id"], previous, value)
+
+        hourly = loc.get("hourly")
+        if hourly and hourly.get("waveHeight"):
+            forecast = (
+                int(hourly["start"]),
+                np.asarray(hourly["waveHeight"], dtype=np.float64),
+                np.asarray(hourly["windSpeed"], dtype=np.float64),
+            )
+            known = self.hourly.get(loc["id"])
+            if known is None or known[0] != forecast[0] or not (np.array_equal(known[1], forecast[1], equal_nan=True) and np.array_equal(known[2], forecast[2], equal_nan=True)):
+                self.hourly[loc["id"]] = forecast
+                self._forecast = None
+                self.version += 1
+
+    def remove(self, location_id: str):
+        if self.positions.pop(location_id, None) is not None:
+            self.values.pop(location_id, None)
+            self._dirty = True
+        if self.hourly.pop(location_id, None) is not None:
+            self._forecast = None
+
+    def ensure_built(self):
+        if self._dirty:
+            positions = dict(self.positions)
+            self._install(self._compute_geometry(positions))
+
+    async def ensure_built_async(self):
+        """Like ensure_built, but computes the neighbor geometry off the event loop."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while self._dirty:
+                positions = dict(self.positions)
+                geometry = await asyncio.to_thread(self._compute_geometry, positions)
+                # Harbors that moved meanwhile need another pass; value-only changes are picked up by _install
+                if positions == self.positions:
+                    self._install(geometry)
+
+    def _compute_geometry(self, positions: Dict[str, Tuple[float, float]]):
+        """Up to `neighbors` nearest harbors within `max_km` of every cell, with normalized IDW weights.
+
+        A pure function of `positions`, safe to run in a worker thread. Cells are
+        processed in tiles against only the harbors that can reach the tile.
+        """
+        ids = list(positions)
+        cells = self.rows * self.cols
+        k = max(1, min(self.neighbors, len(ids)))
+        idx = np.zeros((cells, k), dtype=np.int32)
+        # Cells no harbor reaches keep NaN weights, i.e. no data
+        weights = np.full((cells, k), np.nan)
+        if not ids:
+            return ids, idx, weights
+        station_lat = np.array([positions[i][0] for i in ids])
+        station_lng = np.array([positions[i][1] for i in ids])
+        min_lat, min_lng, _, _ = self.bounds
+        lats = min_lat + (np.arange(self.rows) + 0.5) * self.resolution
+        lngs = min_lng + (np.arange(self.cols) + 0.5) * self.resolution
+        reach_lat = self.max_km / KM_PER_DEGREE
+
+        for row0 in range(0, self.rows, TILE_CELLS):
+            tile_lats = lats[row0:row0 + TILE_CELLS]
+            lng_scale = math.cos(math.radians(min(89.0, max(abs(tile_lats[0]), abs(tile_lats[-1])) + reach_lat)))
+            reach_lng = reach_lat / max(lng_scale, 1e-6)
+            in_band = np.flatnonzero((station_lat >= tile_lats[0] - reach_lat) & (station_lat <= tile_lats[-1] + reach_lat))
+            for col0 in range(0, self.cols, TILE_CELLS):
+                tile_lngs = lngs[col0:col0 + TILE_CELLS]
+                near = in_band[(station_lng[in_band] >= tile_lngs[0] - reach_lng) & (station_lng[in_band] <= tile_lngs[-1] + reach_lng)]
+                if near.size == 0:
+                    continue
+                cell_ids = (np.arange(row0, row0 + tile_lats.size)[:, None] * self.cols + np.arange(col0, col0 + tile_lngs.size)[None, :]).ravel()
+                cell_lat = np.repeat(tile_lats, tile_lngs.size)
+                cell_lng = np.tile(tile_lngs, tile_lats.size)
+                # Equirectangular distances are plenty accurate at harbor-neighborhood scale
+                dlat = cell_lat[:, None] - station_lat[None, near]
+                dlng = (cell_lng[:, None] - station_lng[None, near]) * np.cos(np.radians(cell_lat[:, None]))
+                dist = np.hypot(dlat, dlng) * KM_PER_DEGREE
+                kt = min(k, near.size)
+                if kt < near.size:
+                    nearest = np.argpartition(dist, kt - 1, axis=1)[:, :kt]
+                else:
+                    nearest = np.broadcast_to(np.arange(kt), (dist.shape[0], kt))
+                near_dist = np.take_along_axis(dist, nearest, axis=1)
+                w = np.where(near_dist <= self.max_km, 1.0 / np.maximum(near_dist, 1.0) ** self.power, 0.0)
+                total = w.sum(axis=1, keepdims=True)
+                reached = total[:, 0] > 0
+                tile_weights = np.zeros((cell_ids.size, k))
+                tile_weights[:, :kt] = w / np.where(total > 0, total, 1.0)
+                tile_weights[~reached] = np.nan
+                weights[cell_ids] = tile_weights
+                idx[cell_ids, :kt] = near[nearest]
+        return ids, idx, weights
+
+    def _install(self, geometry):
+        ids, idx, weights = geometry
+        self._slot = {location_id: slot for slot, location_id in enumerate(ids)}
+        self._idx = idx
+        self._weights = weights.astype(np.float32)
+        self._forecast = None
+
+        # Inverted index: which cells (and with what weight) each harbor contributes to
+        k = idx.shape[1]
+        flat_weights = weights.ravel()
+        live = np.flatnonzero(flat_weights > 0)
+        owners = idx.ravel()[live]
+        order = np.argsort(owners, kind="stable")
+        self._contrib_cells = (live[order] // k).astype(np.int32)
+        self._contrib_weights = flat_weights[live[order]]
+        self._contrib_starts = np.searchsorted(owners[order], np.arange(len(ids) + 1))
+
+        station_wave = np.array([self.values[i][0] for i in ids] or [np.nan])
+        station_wind = np.array([self.values[i][1] for i in ids] or [np.nan])
+        self.wave = (weights * station_wave[idx]).sum(axis=1)
+        self.wind = (weights * station_wind[idx]).sum(axis=1)
+        self.classes = classify(self.wave, self.wind, self.caution, self.do_not_go)
+        self._dirty = False
+        self.version += 1
+
+    def _apply_delta(self, location_id: str, previous: Tuple[float, float], value: Tuple[float, float]):
+        slot = self._slot[location_id]
+        span = slice(self._contrib_starts[slot], self._contrib_starts[slot + 1])
+        cells = self._contrib_cells[span]
+        weights = self._contrib_weights[span]
+        # A harbor appears at most once in a cell's neighbor list, so fancy-index adds are safe
+        self.wave[cells] += weights * (value[0] - previous[0])
+        self.wind[cells] += weights * (value[1] - previous[1])
+        self.classes[cells] = classify(self.wave[cells], self.wind[cells], self.caution, self.do_not_go)
+        self.version += 1
+
+    def _forecast_matrix(self) -> Tuple[int, np.ndarray, np.ndarray]:
+        """(base epoch, wave, wind): every harbor's forecast on one hourly axis, by slot, NaN-padded."""
+        if self._forecast is None:
+            slots = len(self._slot)
+            known = [(self._slot[location_id], forecast) for location_id, forecast in self.hourly.items() if location_id in self._slot]
+            base = min((forecast[0] for _, forecast in known), default=0)
+            hours = max((int(forecast[0] - base) // HOUR + forecast[1].size for _, forecast in known), default=0)
+            wave = np.full((max(slots, 1), hours + 1), np.nan)
+            wind = np.full((max(slots, 1), hours + 1), np.nan)
+            for slot, (start, slot_wave, slot_wind) in known:
+                first = int(start - base) // HOUR
+                wave[slot, first:first + slot_wave.size] = slot_wave
+                wind[slot, first:first + slot_wind.size] = slot_wind
+            self._forecast = (base, wave, wind)
+        return self._forecast
+
+    def forecast(self, cells: np.ndarray, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Wave/wind at each cell at each epoch time, linearly interpolated between forecast hours.
+
+        Harbors with no forecast covering a time are left out of that blend; NaN
+        where none of a cell's neighbors has one.
+        """
+        self.ensure_built()
+        base, wave, wind = self._forecast_matrix()
+        position = (times - base) / HOUR
+        hour = np.floor(position).astype(np.int64)
+        frac = position - hour
+        covered = (hour >= 0) & (hour + 1 < wave.shape[1])
+        hour = np.where(covered, hour, 0)
+
+        idx = self._idx[cells]
+        weights = self._weights[cells].astype(np.float64)
+        h0, h1, t = hour[:, None], hour[:, None] + 1, frac[:, None]
+        station_wave = wave[idx, h0] * (1 - t) + wave[idx, h1] * t
+        station_wind = wind[idx, h0] * (1 - t) + wind[idx, h1] * t
+        usable = np.isfinite(station_wave) & np.isfinite(station_wind) & (weights > 0) & covered[:, None]
+        w = np.where(usable, weights, 0.0)
+        total = w.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            blended_wave = np.where(total > 0, (w * np.nan_to_num(station_wave)).sum(axis=1) / total, np.nan)
+            blended_wind = np.where(total > 0, (w * np.nan_to_num(station_wind)).sum(axis=1) / total, np.nan)
+        return blended_wave, blended_wind
+
+    def cell_index(self, lat: float, lng: float) -> Optional[int]:
+        min_lat, min_lng, _, _ = self.bounds
+        row = math.floor((lat - min_lat) / self.resolution)
+        col = math.floor((lng - min_lng) / self.resolution)
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return None
+        return row * self.cols + col
+
+    def at(self, lat: float, lng: float) -> Optional[dict]:
+        """Interpolated conditions and hazard class at a point (None outside the grid)."""
+        self.ensure_built()
+        cell = self.cell_index(lat, lng)
+        if cell is None:
+            return None
+        code = int(self.classes[cell])
+        if code == NO_DATA:
+            return {"status": None, "waveHeight": None, "windSpeed": None}
+        return {
+            "status": STATUS_CODES[code],
+            "waveHeight": round(float(self.wave[cell]), 2),
+            "windSpeed": round(float(self.wind[cell]), 1),
+        }
+
+    def tile(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float, step: int = 1) -> dict:
+        """Class codes for a bounding box, south-to-north rows, every `step`-th cell."""
+        self.ensure_built()
+        grid_min_lat, grid_min_lng, _, _ = self.bounds
+        row0 = max(0, math.floor((min_lat - grid_min_lat) / self.resolution))
+        row1 = min(self.rows, math.ceil((max_lat - grid_min_lat) / self.resolution))
+        col0 = max(0, math.floor((min_lng - grid_min_lng) / self.resolution))
+        col1 = min(self.cols, math.ceil((max_lng - grid_min_lng) / self.resolution))
+        codes = self.classes.reshape(self.rows, self.cols)[row0:row1:step, col0:col1:step]
+        return {
+            "bounds": [
+                grid_min_lat + row0 * self.resolution,
+                grid_min_lng + col0 * self.resolution,
+                grid_min_lat + row1 * self.resolution,
+                grid_min_lng + col1 * self.resolution,
+            ],
+            "resolution": self.resolution * step,
+            "rows": codes.shape[0],
+            "cols": codes.shape[1],
+            "classes": STATUS_CODES,
+            "noData": NO_DATA,
+            "version": self.version,
+            "rle": run_length_encode(codes.ravel()),
+        }
+
+
+def run_length_encode(codes: np.ndarray) -> List[int]:
+    """Flat [value, count, value, count, ...] runs; class maps are mostly long runs."""
+    if codes.size == 0:
+        return []
+    boundaries = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate(([0], boundaries))
+    counts = np.diff(np.concatenate((starts, [codes.size])))
+    runs = np.empty(starts.size * 2, dtype=np.int64)
+    runs[0::2] = codes[starts]
+    runs[1::2] = counts
+    return runs.tolist()
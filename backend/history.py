@@ -0,0 +1,263 @@
+import datetime
+import heapq
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from scheduler import parse_timestamp
+
+HISTORY_FIELDS = ("waveHeight", "windSpeed", "seaTemperature")
+STATUS_CODES = ["SAFE TO GO", "Caution", "DO NOT GO"]
+BUCKET_SECONDS = {"hour": 3600, "day": 86400}
+
+
+# Latest instant a naive UTC datetime can hold (9999-12-31T23:59:59)
+MAX_TIMESTAMP = 253402300799.0
+
+
+def utc_datetime(ts: float) -> datetime.datetime:
+    """Naive UTC datetime for epoch seconds, clamped to the range datetime can represent."""
+    return datetime.datetime.utcfromtimestamp(min(max(ts, 0.0), MAX_TIMESTAMP))
+
+
+def to_iso(ts: float) -> str:
+    return datetime.datetime.utcfromtimestamp(ts).isoformat() + "Z"
+
+
+def status_code(status: Optional[str]) -> int:
+    return STATUS_CODES.index(status) if status in STATUS_CODES else 0
+
+
+class Ring:
+    """Fixed-capacity ring of typed array columns, ordered by the `ts` column.
+
+    Columns grow until `capacity` is reached and then overwrite the oldest row,
+    so memory per series is bounded and a row costs a few bytes per column.
+    """
+
+    __slots__ = ("capacity", "columns", "size", "head")
+
+    def __init__(self, capacity: int, typecodes: Dict[str, str]):
+        self.capacity = capacity
+        self.columns = {name: array(code) for name, code in typecodes.items()}
+        self.size = 0
+        self.head = 0
+
+    def _pos(self, i: int) -> int:
+        return (self.head - self.size + i) % self.capacity
+
+    def append(self, values: dict):
+        if self.size < self.capacity:
+            for name, column in self.columns.items():
+                column.append(values[name])
+            self.size += 1
+            self.head = self.size % self.capacity
+        else:
+            for name, column in self.columns.items():
+                column[self.head] = values[name]
+            self.head = (self.head + 1) % self.capacity
+
+    def get(self, name: str, i: int):
+        return self.columns[name][self._pos(i)]
+
+    def set(self, name: str, i: int, value):
+        self.columns[name][self._pos(i)] = value
+
+    def bisect(self, ts: float) -> int:
+        """Logical index of the first row with ts >= `ts`."""
+        lo, hi = 0, self.size
+        column = self.columns["ts"]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if column[self._pos(mid)] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def newest_first(self, start: float, end: float) -> Iterator[int]:
+        """Logical indexes with start <= ts < end, newest first."""
+        i = self.bisect(end) - 1
+        column = self.columns["ts"]
+        while i >= 0 and column[self._pos(i)] >= start:
+            yield i
+            i -= 1
+
+
+class LocationSeries:
+    """Raw samples plus incrementally maintained hourly/daily rollups for one location."""
+
+    __slots__ = ("raw", "rollups")
+
+    def __init__(self, capacity: int, rollup_capacity: Dict[str, int]):
+        raw_columns = {"ts": "d", "status": "b"}
+        raw_columns.update({field: "f" for field in HISTORY_FIELDS})
+        self.raw = Ring(capacity, raw_columns)
+
+        rollup_columns = {"ts": "d", "count": "I", "status": "b"}
+        for field in HISTORY_FIELDS:
+            rollup_columns.update({f"{field}_min": "f", f"{field}_max": "f", f"{field}_sum": "d"})
+        self.rollups = {bucket: Ring(cap, rollup_columns) for bucket, cap in rollup_capacity.items()}
+
+    def append(self, ts: float, values: dict):
+        raw = self.raw
+        if raw.size and ts <= raw.get("ts", raw.size - 1):
+            # Out-of-order or duplicate sample; rings must stay sorted by ts
+            return
+        raw.append(dict(values, ts=ts))
+
+        for bucket, ring in self.rollups.items():
+            start = ts - ts % BUCKET_SECONDS[bucket]
+            last = ring.size - 1
+            if ring.size and ring.get("ts", last) == start:
+                ring.set("count", last, ring.get("count", last) + 1)
+                ring.set("status", last, max(ring.get("status", last), values["status"]))
+                for field in HISTORY_FIELDS:
+                    value = values[field]
+                    ring.set(f"{field}_min", last, min(ring.get(f"{field}_min", last), value))
+                    ring.set(f"{field}_max", last, max(ring.get(f"{field}_max", last), value))
+                    ring.set(f"{field}_sum", last, ring.get(f"{field}_sum", last) + value)
+            else:
+                row = {"ts": start, "count": 1, "status": values["status"]}
+                for field in HISTORY_FIELDS:
+                    row.update({f"{field}_min": values[field], f"{field}_max": values[field], f"{field}_sum": values[field]})
+                ring.append(row)
+
+
+class MemoryHistoryStore:
+    """In-memory history fallback: one array-backed ring buffer per location."""
+
+    def __init__(self, capacity: int = 8640, hourly_capacity: int = 24 * 180, daily_capacity: int = 730):
+        self.capacity = capacity
+        self.rollup_capacity = {"hour": hourly_capacity, "day": daily_capacity}
+        self.series: Dict[str, LocationSeries] = {}
+
+    async def append(self, loc: dict):
+        series = self.series.get(loc["id"])
+        if series is None:
+            series = self.series[loc["id"]] = LocationSeries(self.capacity, self.rollup_capacity)
+        values = {field: float(loc.get(field) or 0.0) for field in HISTORY_FIELDS}
+        values["status"] = status_code(loc.get("status"))
+        series.append(parse_timestamp(loc.get("updatedAt")), values)
+
+    def _raw_rows(self, location_id: str, start: float, end: float) -> Iterator[dict]:
+        ring = self.series[location_id].raw
+        for i in ring.newest_first(start, end):
+            row = {"locationId": location_id, "ts": ring.get("ts", i), "status": STATUS_CODES[ring.get("status", i)]}
+            for field in HISTORY_FIELDS:
+                row[field] = round(ring.get(field, i), 2)
+            yield row
+
+    async def samples(self, location_id: Optional[str], start: float, end: float, limit: int, before: Optional[tuple] = None) -> List[dict]:
+        """Raw samples newest first; `before` is an exclusive (ts, locationId) pagination key."""
+        if before is not None:
+            # Include the cursor's own timestamp, other locations may share it
+            end = min(end, before[0] + 1e-6)
+        if location_id is not None:
+            if location_id not in self.series:
+                return []
+            streams = [self._raw_rows(location_id, start, end)]
+        else:
+            streams = [self._raw_rows(series_id, start, end) for series_id in sorted(self.series, reverse=True)]
+        merged = heapq.merge(*streams, key=lambda row: (row["ts"], row["locationId"]), reverse=True)
+        if before is not None:
+            merged = (row for row in merged if (row["ts"], row["locationId"]) < before)
+        return [row for _, row in zip(range(limit), merged)]
+
+    async def buckets(self, location_id: str, bucket: str, start: float, end: float, limit: int) -> List[dict]:
+        if location_id not in self.series:
+            return []
+        ring = self.series[location_id].rollups[bucket]
+        rows = []
+        for i in ring.newest_first(start, end):
+            count = ring.get("count", i)
+            row = {"locationId": location_id, "ts": ring.get("ts", i), "count": count, "status": STATUS_CODES[ring.get("status", i)]}
+            for field in HISTORY_FIELDS:
+                row[field] = {
+                    "min": round(ring.get(f"{field}_min", i), 2),
+                    "max": round(ring.get(f"{field}_max", i), 2),
+                    "mean": round(ring.get(f"{field}_sum", i) / count, 2),
+                }
+            rows.append(row)
+            if len(rows) >= limit:
+                break
+        return rows
+
+
+class MongoHistoryStore:
+    """History backed by a MongoDB time-series collection (falls back to a plain indexed collection)."""
+
+    def __init__(self, db, name: str = "telemetry_history", retention_days: int = 365):
+        self.db = db
+        self.name = name
+        self.retention_days = retention_days
+        self.collection = db[name]
+
+    async def ensure_collection(self):
+        if self.name in await self.db.list_collection_names():
+            return
+        try:
+            await self.db.create_collection(
+                self.name,
+                timeseries={"timeField": "ts", "metaField": "locationId", "granularity": "minutes"},
+                expireAfterSeconds=self.retention_days * 86400,
+            )
+        except Exception as e:
+            print(f"Time-series collections unavailable ({str(e)}), using a regular collection for history.")
+            await self.collection.create_index([("locationId", 1), ("ts", -1)])
+
+    async def append(self, loc: dict):
+        doc = {
+            "ts": datetime.datetime.utcfromtimestamp(parse_timestamp(loc.get("updatedAt"))),
+            "locationId": loc["id"],
+            "status": loc.get("status"),
+        }
+        for field in HISTORY_FIELDS:
+            doc[field] = loc.get(field)
+        await self.collection.insert_one(doc)
+
+    def _match(self, location_id: Optional[str], start: float, end: float) -> dict:
+        # An open range (start 0, end infinite) leaves that bound out; datetimes cannot represent infinity
+        ts = {}
+        if start > 0:
+            ts["$gte"] = utc_datetime(start)
+        if end < MAX_TIMESTAMP:
+            ts["$lt"] = utc_datetime(end)
+        match = {"ts": ts} if ts else {}
+        if location_id is not None:
+            match["locationId"] = location_id
+        return match
+
+    async def samples(self, location_id: Optional[str], start: float, end: float, limit: int, before: Optional[tuple] = None) -> List[dict]:
+        match = self._match(location_id, start, end)
+        if before is not None:
+            before_ts = utc_datetime(before[0])
+            match["$or"] = [{"ts": {"$lt": before_ts}}, {"ts": before_ts, "locationId": {"$lt": before[1]}}]
+        cursor = self.collection.find(match, {"_id": 0}).sort([("ts", -1), ("locationId", -1)]).limit(limit)
+        rows = []
+        async for doc in cursor:
+            doc["ts"] = doc["ts"].replace(tzinfo=datetime.timezone.utc).timestamp()
+            rows.append(doc)
+        return rows
+
+    async def buckets(self, location_id: str, bucket: str, start: float, end: float, limit: int) -> List[dict]:
+        group = {"_id": {"$dateTrunc": {"date": "$ts", "unit": bucket}}, "count": {"$sum": 1}, "statuses": {"$addToSet": "$status"}}
+        for field in HISTORY_FIELDS:
+            group.update({f"{field}_min": {"$min": f"${field}"}, f"{field}_max": {"$max": f"${field}"}, f"{field}_mean": {"$avg": f"${field}"}})
+        pipeline = [
+            {"$match": self._match(location_id, start, end)},
+            {"$group": group},
+            {"$sort": {"_id": -1}},
+            {"$limit": limit},
+        ]
+        rows = []
+        async for doc in self.collection.aggregate(pipeline):
+            row = {
+                "locationId": location_id,
+                "ts": doc["_id"].replace(tzinfo=datetime.timezone.utc).timestamp(),
+                "count": doc["count"],
+                "status": STATUS_CODES[max(status_code(s) for s in doc["statuses"])],
+            }
+            for field in HISTORY_FIELDS:
+                row[field] = {stat: round(doc[f"{field}_{stat}"] or 0.0, 2) for stat in ("min", "max", "mean")}
+            rows.append(row)
+        return rows
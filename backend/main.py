@@ -1,18 +1,58 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
-from pydantic import BaseModel
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Annotated, List, Literal, Optional, Tuple
+from pydantic import BaseModel, Field
 import uvicorn
+import asyncio
 import datetime
+import json
+import math
 import os
-import httpx
+import time
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
 from dotenv import load_dotenv
+from registry import LocationRegistry, RegistryWatcher
+from scheduler import RefreshScheduler, parse_iso, parse_timestamp
+from shared import LocalSharedStore, MongoSharedStore, SharedSync
+from snapshot import SnapshotStore, SnapshotWriter
+from sync import SyncLog, encode_msgpack, msgpack
+from history import MemoryHistoryStore, MongoHistoryStore, to_iso
+from response_cache import ResponseCache
+from spatial import GridIndex
+from stream import StatusHub, diff_location
+from sos import ConsoleSmsGateway, SosPipeline
+from hazard import HazardField
+from metrics import MongoCommandMetrics, Registry, RequestMetrics, StackSampler
+from route_safety import MAX_REQUEST_SAMPLES, MAX_ROUTE_KM, RouteEvaluator, route_lengths_km
+from windows import DepartureWindows
+from upstream import UpstreamClient, UpstreamError
 
 load_dotenv()
 
 app = FastAPI(title="Marine Safety & Navigation API")
 
+# Prometheus metrics, served at /metrics
+metrics_registry = Registry()
+http_request_seconds = metrics_registry.histogram(
+    "marine_http_request_duration_seconds", "HTTP request latency by route template.", ("route", "method", "status")
+)
+upstream_fetch_seconds = metrics_registry.histogram(
+    "marine_upstream_fetch_duration_seconds", "WeatherAPI fetch time per location, retries included.", ("location",)
+)
+upstream_fetch_total = metrics_registry.counter(
+    "marine_upstream_fetch_total", "WeatherAPI fetches per location by outcome (success, mock, error).", ("location", "outcome")
+)
+mongo_command_seconds = metrics_registry.histogram("marine_mongo_command_duration_seconds", "MongoDB command latency.", ("command",))
+mongo_command_failures = metrics_registry.counter("marine_mongo_command_failures_total", "Failed MongoDB commands.", ("command",))
+profiler = StackSampler()
+
+app.add_middleware(RequestMetrics, histogram=http_request_seconds)
+
 # Setup CORS
 app.add_middleware(
     CORSMiddleware,
@@ -20,19 +60,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # The frontend is served from another origin and reads these response headers
+    expose_headers=["X-Next-Cursor", "X-Sync-Version", "ETag"],
 )
 
+
+@app.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError):
+    """The default 422, except that NaN/Infinity inputs are echoed as strings so the error stays valid JSON."""
+    detail = jsonable_encoder(exc.errors(), custom_encoder={float: lambda value: value if math.isfinite(value) else str(value)})
+    return JSONResponse(status_code=422, content={"detail": detail})
+
 # MongoDB Connection (with Graceful Fallback)
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-client = AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=2000)
+client = AsyncIOMotorClient(
+    MONGO_URL,
+    serverSelectionTimeoutMS=int(os.getenv("MONGO_TIMEOUT_MS", "2000")),
+    event_listeners=[MongoCommandMetrics(mongo_command_seconds, mongo_command_failures)],
+)
 db = client.marine_safety
-MOCK_MEM_DB = {"locations": [], "sos": []}
+MOCK_MEM_DB = {"sos": []}
 MONGODB_AVAILABLE = False
 
+# Telemetry refresh settings (seconds / parallel upstream fetches)
+REFRESH_TTL_SECONDS = float(os.getenv("REFRESH_TTL_SECONDS", "900"))
+REFRESH_CONCURRENCY = int(os.getenv("REFRESH_CONCURRENCY", "8"))
+
+# Days of hourly marine forecast to keep per location (feeds the departure window timeline)
+MARINE_FORECAST_DAYS = int(os.getenv("MARINE_FORECAST_DAYS", "3"))
+
+# Shared, pooled WeatherAPI client (rate in requests/second across the whole app)
+weather_api = UpstreamClient(
+    os.getenv("WEATHER_API_URL", "https://api.weatherapi.com/v1"),
+    max_concurrency=int(os.getenv("WEATHER_API_CONCURRENCY", "16")),
+    rate=float(os.getenv("WEATHER_API_RATE", "10")),
+    burst=int(os.getenv("WEATHER_API_BURST", "20")),
+)
+
 # Dummy Pydantic models
 class LocationData(BaseModel):
     id: str
     name: str
+    region: Optional[str] = None
     lat: float
     lng: float
     waveHeight: float
@@ -51,17 +120,25 @@ class LocationData(BaseModel):
     aqi: Optional[int] = None
     alerts: Optional[list] = []
     forecast14: Optional[list] = []
+    updatedAt: Optional[str] = None
+    version: Optional[int] = None
+    stale: Optional[bool] = None
+
+
+# (wave height m, wind speed km/h) limits above which a status applies
+DO_NOT_GO_LIMITS = (3.0, 45.0)
+CAUTION_LIMITS = (2.0, 30.0)
 
 
 def get_safety_status(wave_height: float, wind_speed: float) -> tuple[str, str]:
     """Calculate status and advisory based on realtime marine inputs."""
     
     # DO NOT GO: Waves > 3.0m OR Wind > 45km/h
-    if wave_height > 3.0 or wind_speed > 45.0:
+    if wave_height > DO_NOT_GO_LIMITS[0] or wind_speed > DO_NOT_GO_LIMITS[1]:
         return ("DO NOT GO", "High winds and large waves. It is not safe to navigate!")
         
     # Caution: Waves > 2.0m OR Wind > 30km/h
-    elif wave_height > 2.0 or wind_speed > 30.0:
+    elif wave_height > CAUTION_LIMITS[0] or wind_speed > CAUTION_LIMITS[1]:
         return ("Caution", "Moderate waves and gusts. Exercise caution during operations.")
         
     # Safe to Go
@@ -74,203 +151,720 @@ async def fetch_realtime_marine_data(loc: dict) -> dict:
     
     api_key = os.getenv("WEATHER_API_KEY")
     updated_loc = loc.copy()
+    started = time.perf_counter()
     
     # If no key is provided, we gracefully fallback to the local mock data
     if not api_key:
         print(f"No WEATHER_API_KEY found. Falling back to mock data for {loc['name']}.")
+        upstream_fetch_total.inc(loc["id"], "mock")
         return updated_loc
         
-    url = f"http://api.weatherapi.com/v1/forecast.json?key={api_key}&q={loc['lat']},{loc['lng']}&days=14&aqi=yes&alerts=yes"
-    marine_url = f"http://api.weatherapi.com/v1/marine.json?key={api_key}&q={loc['lat']},{loc['lng']}&days=1"
+    query = {"key": api_key, "q": f"{loc['lat']},{loc['lng']}"}
+    
+    try:
+        # Forecast and marine calls run in parallel over the shared connection pool
+        weather_data, marine_data = await asyncio.gather(
+            weather_api.get_json("/forecast.json", {**query, "days": 14, "aqi": "yes", "alerts": "yes"}),
+            weather_api.get_json("/marine.json", {**query, "days": MARINE_FORECAST_DAYS}),
+        )
+    except UpstreamError as e:
+        print(f"API Error for {loc['name']}: {str(e)}. Falling back to last-known values.")
+        upstream_fetch_seconds.observe(time.perf_counter() - started, loc["id"])
+        upstream_fetch_total.inc(loc["id"], "error")
+        return updated_loc
+    except Exception as e:
+        print(f"Error fetching live data for {loc['name']}: {str(e)}. Falling back to last-known values.")
+        upstream_fetch_seconds.observe(time.perf_counter() - started, loc["id"])
+        upstream_fetch_total.inc(loc["id"], "error")
+        return updated_loc
+    upstream_fetch_seconds.observe(time.perf_counter() - started, loc["id"])
+    
+    current = weather_data.get("current", {})
+    
+    # Extract marine data (wave height/direction)
+    forecast_day = marine_data.get("forecast", {}).get("forecastday", [])
+    # Keep every forecast hour as columns; the departure window index classifies them
+    marine_hours = [hour for day in forecast_day for hour in day.get("hour", [])]
+    weather_wind = {
+        hour.get("time_epoch"): hour.get("wind_kph")
+        for day in weather_data.get("forecast", {}).get("forecastday", [])
+        for hour in day.get("hour", [])
+    }
+    if marine_hours:
+        updated_loc["hourly"] = {
+            "start": marine_hours[0].get("time_epoch"),
+            "waveHeight": [hour.get("sig_ht_mt") for hour in marine_hours],
+            "windSpeed": [
+                hour.get("wind_kph") if hour.get("wind_kph") is not None else weather_wind.get(hour.get("time_epoch"))
+                for hour in marine_hours
+            ],
+        }
+    daily_max_wave = {
+        day.get("date"): max((hour["sig_ht_mt"] for hour in day.get("hour", []) if hour.get("sig_ht_mt") is not None), default=None)
+        for day in forecast_day
+    }
+    if forecast_day:
+        hour_data = forecast_day[0].get("hour", [])
+        # Just grab the first hour for simplicity of current wave data
+        if hour_data:
+            updated_loc["waveHeight"] = round(hour_data[0].get("sig_ht_mt", loc["waveHeight"]), 1)
+            updated_loc["waveDirection"] = round(hour_data[0].get("swell_dir", loc.get("waveDirection", 0.0)), 1)
+            # Note: WeatherAPI marine also has water_temp_c, but we can stick to current temp or grab it
+            updated_loc["seaTemperature"] = round(hour_data[0].get("water_temp_c", loc["seaTemperature"]), 1)
+    
+    updated_loc["windSpeed"] = round(current.get("wind_kph", loc["windSpeed"]), 1)
+    updated_loc["windDirection"] = round(current.get("wind_degree", loc.get("windDirection", 0.0)), 1)
+    updated_loc["visibility"] = round(current.get("vis_km", loc["visibility"]) / 1.852, 1) # Convert km to NM
+    updated_loc["pressure"] = round(current.get("pressure_mb", loc["pressure"]))
+    updated_loc["humidity"] = round(current.get("humidity", loc["humidity"]))
+    
+    # Add extra fields that WeatherAPI provides
+    updated_loc["aqi"] = current.get("air_quality", {}).get("us-epa-index", 1)
+    updated_loc["alerts"] = weather_data.get("alerts", {}).get("alert", [])
+    
+    # Add Forecast Data
+    forecast_days = weather_data.get("forecast", {}).get("forecastday", [])
+    forecast_mapped = []
+    for day in forecast_days:
+        day_data = day.get("day", {})
+        astro_data = day.get("astro", {})
+        
+        # Daily outlook uses the day's peak wave and wind; days past the marine horizon have no wave data
+        max_wave = daily_max_wave.get(day.get("date"))
+        max_wind = day_data.get("maxwind_kph")
+        outlook = get_safety_status(max_wave, max_wind)[0] if max_wave is not None and max_wind is not None else None
+        
+        forecast_mapped.append({
+            "date": day.get("date"),
+            "maxtemp_c": day_data.get("maxtemp_c"),
+            "mintemp_c": day_data.get("mintemp_c"),
+            "condition": day_data.get("condition", {}).get("text"),
+            "icon": day_data.get("condition", {}).get("icon"),
+            "daily_chance_of_rain": day_data.get("daily_chance_of_rain", 0),
+            "maxwind_kph": max_wind,
+            "maxWaveHeight": max_wave,
+            "status": outlook,
+            "sunrise": astro_data.get("sunrise"),
+            "sunset": astro_data.get("sunset")
+        })
+    updated_loc["forecast14"] = forecast_mapped
+    
+    # Calculate safety boundaries based on real data
+    status, advisory = get_safety_status(updated_loc["waveHeight"], updated_loc["windSpeed"])
+    updated_loc["status"] = status
+    updated_loc["advisory"] = advisory
+    updated_loc["updatedAt"] = datetime.datetime.utcnow().isoformat() + "Z"
+    upstream_fetch_total.inc(loc["id"], "success")
     
-    async with httpx.AsyncClient() as client:
-        try:
-            weather_res = await client.get(url, timeout=10.0)
-            marine_res = await client.get(marine_url, timeout=10.0)
-            
-            if weather_res.status_code == 200 and marine_res.status_code == 200:
-                weather_data = weather_res.json()
-                marine_data = marine_res.json()
-                
-                current = weather_data.get("current", {})
-                
-                # Extract marine data (wave height/direction)
-                forecast_day = marine_data.get("forecast", {}).get("forecastday", [])
-                if forecast_day:
-                    hour_data = forecast_day[0].get("hour", [])
-                    # Just grab the first hour for simplicity of current wave data
-                    if hour_data:
-                        updated_loc["waveHeight"] = round(hour_data[0].get("sig_ht_mt", loc["waveHeight"]), 1)
-                        updated_loc["waveDirection"] = round(hour_data[0].get("swell_dir", loc.get("waveDirection", 0.0)), 1)
-                        # Note: WeatherAPI marine also has water_temp_c, but we can stick to current temp or grab it
-                        updated_loc["seaTemperature"] = round(hour_data[0].get("water_temp_c", loc["seaTemperature"]), 1)
-                
-                updated_loc["windSpeed"] = round(current.get("wind_kph", loc["windSpeed"]), 1)
-                updated_loc["windDirection"] = round(current.get("wind_degree", loc.get("windDirection", 0.0)), 1)
-                updated_loc["visibility"] = round(current.get("vis_km", loc["visibility"]) / 1.852, 1) # Convert km to NM
-                updated_loc["pressure"] = round(current.get("pressure_mb", loc["pressure"]))
-                updated_loc["humidity"] = round(current.get("humidity", loc["humidity"]))
-                
-                # Add extra fields that WeatherAPI provides
-                updated_loc["aqi"] = current.get("air_quality", {}).get("us-epa-index", 1)
-                updated_loc["alerts"] = weather_data.get("alerts", {}).get("alert", [])
-                
-                # Add Forecast Data
-                forecast_days = weather_data.get("forecast", {}).get("forecastday", [])
-                forecast_mapped = []
-                for day in forecast_days:
-                    day_data = day.get("day", {})
-                    astro_data = day.get("astro", {})
-                    
-                    forecast_mapped.append({
-                        "date": day.get("date"),
-                        "maxtemp_c": day_data.get("maxtemp_c"),
-                        "mintemp_c": day_data.get("mintemp_c"),
-                        "condition": day_data.get("condition", {}).get("text"),
-                        "icon": day_data.get("condition", {}).get("icon"),
-                        "daily_chance_of_rain": day_data.get("daily_chance_of_rain", 0),
-                        "sunrise": astro_data.get("sunrise"),
-                        "sunset": astro_data.get("sunset")
-                    })
-                updated_loc["forecast14"] = forecast_mapped
-                
-                # Calculate safety boundaries based on real data
-                status, advisory = get_safety_status(updated_loc["waveHeight"], updated_loc["windSpeed"])
-                updated_loc["status"] = status
-                updated_loc["advisory"] = advisory
-                
-            else:
-                 print(f"API Error: WeatherAPI returned {weather_res.status_code}. Falling back to mock values.")
-
-        except Exception as e:
-            print(f"Error fetching live data for {loc['name']}: {str(e)}. Falling back to mock values.")
-            
     return updated_loc
 
-# Comprehensive list of Indian Coastal Areas & Local Fishing Harbors
-LOCATIONS = [
-    # --- Gujarat ---
-    {"id": "kandla", "name": "Kandla Port", "lat": 23.0033, "lng": 70.2195, "waveHeight": 1.2, "windSpeed": 15.0, "seaTemperature": 27.5, "visibility": 10.0, "pressure": 1010, "humidity": 75, "tide": 2.1, "sunrise": "06:58", "sunset": "18:55", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "mundra", "name": "Mundra", "lat": 22.8427, "lng": 69.7346, "waveHeight": 1.1, "windSpeed": 14.0, "seaTemperature": 27.8, "visibility": 11.0, "pressure": 1010, "humidity": 76, "tide": 2.0, "sunrise": "06:56", "sunset": "18:52", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "okha", "name": "Okha Port", "lat": 22.4633, "lng": 69.0706, "waveHeight": 1.4, "windSpeed": 18.0, "seaTemperature": 27.1, "visibility": 12.0, "pressure": 1011, "humidity": 78, "tide": 1.8, "sunrise": "06:59", "sunset": "18:56", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "dwarka", "name": "Dwarka", "lat": 22.2394, "lng": 68.9678, "waveHeight": 2.0, "windSpeed": 22.0, "seaTemperature": 26.9, "visibility": 11.0, "pressure": 1010, "humidity": 79, "tide": 1.6, "sunrise": "07:01", "sunset": "18:58", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "porbandar", "name": "Porbandar", "lat": 21.6417, "lng": 69.6293, "waveHeight": 2.8, "windSpeed": 35.0, "seaTemperature": 27.5, "visibility": 6.0, "pressure": 1008, "humidity": 83, "tide": 1.6, "sunrise": "06:55", "sunset": "18:50", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "veraval", "name": "Veraval Harbor", "lat": 20.9037, "lng": 70.3667, "waveHeight": 2.5, "windSpeed": 30.0, "seaTemperature": 27.8, "visibility": 7.0, "pressure": 1009, "humidity": 80, "tide": 1.5, "sunrise": "06:52", "sunset": "18:48", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "diu", "name": "Diu Fishery", "lat": 20.7144, "lng": 70.9874, "waveHeight": 1.6, "windSpeed": 16.0, "seaTemperature": 28.0, "visibility": 10.0, "pressure": 1011, "humidity": 78, "tide": 1.3, "sunrise": "06:50", "sunset": "18:45", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "bhavnagar", "name": "Bhavnagar", "lat": 21.7645, "lng": 72.1519, "waveHeight": 1.0, "windSpeed": 12.0, "seaTemperature": 28.3, "visibility": 10.0, "pressure": 1010, "humidity": 75, "tide": 2.5, "sunrise": "06:53", "sunset": "18:49", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-
-    # --- Maharashtra ---
-    {"id": "dahanu", "name": "Dahanu", "lat": 19.9806, "lng": 72.7303, "waveHeight": 1.3, "windSpeed": 16.0, "seaTemperature": 27.5, "visibility": 10.0, "pressure": 1010, "humidity": 80, "tide": 1.7, "sunrise": "06:50", "sunset": "18:42", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "mumbai", "name": "Mumbai Port", "lat": 18.9220, "lng": 72.8347, "waveHeight": 3.5, "windSpeed": 45.0, "seaTemperature": 27.8, "visibility": 4.0, "pressure": 1005, "humidity": 85, "tide": 2.1, "sunrise": "06:50", "sunset": "18:45", "status": "DO NOT GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "alibag", "name": "Alibag", "lat": 18.6416, "lng": 72.8722, "waveHeight": 1.8, "windSpeed": 20.0, "seaTemperature": 27.9, "visibility": 11.0, "pressure": 1011, "humidity": 82, "tide": 1.8, "sunrise": "06:48", "sunset": "18:44", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "murud", "name": "Murud-Janjira", "lat": 18.3284, "lng": 72.9642, "waveHeight": 1.7, "windSpeed": 18.0, "seaTemperature": 28.0, "visibility": 12.0, "pressure": 1010, "humidity": 80, "tide": 1.6, "sunrise": "06:46", "sunset": "18:42", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "ratnagiri", "name": "Ratnagiri", "lat": 16.9902, "lng": 73.3120, "waveHeight": 2.1, "windSpeed": 24.0, "seaTemperature": 28.1, "visibility": 9.0, "pressure": 1009, "humidity": 78, "tide": 1.5, "sunrise": "06:44", "sunset": "18:40", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "malvan", "name": "Malvan Fishery", "lat": 16.0601, "lng": 73.4682, "waveHeight": 1.5, "windSpeed": 15.0, "seaTemperature": 28.2, "visibility": 12.0, "pressure": 1011, "humidity": 76, "tide": 1.1, "sunrise": "06:42", "sunset": "18:42", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "vengurla", "name": "Vengurla", "lat": 15.8617, "lng": 73.6334, "waveHeight": 1.4, "windSpeed": 14.0, "seaTemperature": 28.3, "visibility": 12.0, "pressure": 1011, "humidity": 75, "tide": 1.1, "sunrise": "06:41", "sunset": "18:41", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-
-    # --- Goa ---
-    {"id": "goa", "name": "Goa (Panaji)", "lat": 15.4909, "lng": 73.8278, "waveHeight": 1.6, "windSpeed": 18.0, "seaTemperature": 28.5, "visibility": 12.0, "pressure": 1012, "humidity": 75, "tide": 1.0, "sunrise": "06:40", "sunset": "18:40", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "mormugao", "name": "Mormugao", "lat": 15.3986, "lng": 73.8058, "waveHeight": 1.7, "windSpeed": 20.0, "seaTemperature": 28.5, "visibility": 11.0, "pressure": 1011, "humidity": 76, "tide": 1.0, "sunrise": "06:39", "sunset": "18:39", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "canacona", "name": "Canacona", "lat": 15.0113, "lng": 74.0223, "waveHeight": 1.6, "windSpeed": 17.0, "seaTemperature": 28.6, "visibility": 12.0, "pressure": 1012, "humidity": 74, "tide": 1.0, "sunrise": "06:38", "sunset": "18:38", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-
-    # --- Karnataka ---
-    {"id": "karwar", "name": "Karwar", "lat": 14.8053, "lng": 74.1332, "waveHeight": 1.5, "windSpeed": 16.0, "seaTemperature": 28.4, "visibility": 11.0, "pressure": 1010, "humidity": 77, "tide": 1.1, "sunrise": "06:36", "sunset": "18:36", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "gokarna", "name": "Gokarna", "lat": 14.5388, "lng": 74.3168, "waveHeight": 1.4, "windSpeed": 15.0, "seaTemperature": 28.5, "visibility": 12.0, "pressure": 1011, "humidity": 78, "tide": 1.1, "sunrise": "06:35", "sunset": "18:35", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "honnavar", "name": "Honnavar", "lat": 14.2798, "lng": 74.4439, "waveHeight": 1.6, "windSpeed": 18.0, "seaTemperature": 28.3, "visibility": 10.0, "pressure": 1010, "humidity": 79, "tide": 1.0, "sunrise": "06:34", "sunset": "18:34", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "bhatkal", "name": "Bhatkal", "lat": 13.9803, "lng": 74.5583, "waveHeight": 1.7, "windSpeed": 19.0, "seaTemperature": 28.4, "visibility": 9.0, "pressure": 1009, "humidity": 80, "tide": 1.2, "sunrise": "06:33", "sunset": "18:33", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "kundapura", "name": "Kundapura", "lat": 13.6272, "lng": 74.6931, "waveHeight": 1.5, "windSpeed": 17.0, "seaTemperature": 28.5, "visibility": 10.0, "pressure": 1011, "humidity": 77, "tide": 1.1, "sunrise": "06:32", "sunset": "18:32", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "malpe", "name": "Malpe Fishing Harbor", "lat": 13.3500, "lng": 74.6975, "waveHeight": 1.5, "windSpeed": 18.0, "seaTemperature": 28.5, "visibility": 11.0, "pressure": 1010, "humidity": 78, "tide": 1.2, "sunrise": "06:33", "sunset": "18:38", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "mangalore", "name": "Mangalore", "lat": 12.9141, "lng": 74.8560, "waveHeight": 1.9, "windSpeed": 22.0, "seaTemperature": 28.2, "visibility": 10.0, "pressure": 1010, "humidity": 79, "tide": 1.1, "sunrise": "06:30", "sunset": "18:35", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-
-    # --- Kerala ---
-    {"id": "kasaragod", "name": "Kasaragod", "lat": 12.5085, "lng": 74.9904, "waveHeight": 1.7, "windSpeed": 20.0, "seaTemperature": 28.6, "visibility": 10.0, "pressure": 1011, "humidity": 80, "tide": 1.2, "sunrise": "06:28", "sunset": "18:33", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "kannur", "name": "Kannur", "lat": 11.8745, "lng": 75.3704, "waveHeight": 1.6, "windSpeed": 18.0, "seaTemperature": 28.7, "visibility": 11.0, "pressure": 1011, "humidity": 78, "tide": 1.1, "sunrise": "06:26", "sunset": "18:31", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "kozhikode", "name": "Kozhikode", "lat": 11.2588, "lng": 75.7804, "waveHeight": 1.5, "windSpeed": 16.0, "seaTemperature": 28.8, "visibility": 10.0, "pressure": 1010, "humidity": 81, "tide": 1.0, "sunrise": "06:24", "sunset": "18:29", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "kochi", "name": "Kochi", "lat": 9.9312, "lng": 76.2673, "waveHeight": 1.8, "windSpeed": 20.0, "seaTemperature": 28.9, "visibility": 11.0, "pressure": 1011, "humidity": 75, "tide": 1.0, "sunrise": "06:20", "sunset": "18:25", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "alappuzha", "name": "Alappuzha", "lat": 9.4981, "lng": 76.3388, "waveHeight": 1.7, "windSpeed": 19.0, "seaTemperature": 28.8, "visibility": 12.0, "pressure": 1012, "humidity": 76, "tide": 0.9, "sunrise": "06:18", "sunset": "18:24", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "kollam", "name": "Kollam", "lat": 8.8932, "lng": 76.6141, "waveHeight": 1.9, "windSpeed": 22.0, "seaTemperature": 28.7, "visibility": 10.0, "pressure": 1011, "humidity": 77, "tide": 0.9, "sunrise": "06:16", "sunset": "18:22", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "thiruvananthapuram", "name": "Thiruvananthapuram", "lat": 8.5241, "lng": 76.9366, "waveHeight": 2.0, "windSpeed": 23.0, "seaTemperature": 28.6, "visibility": 9.0, "pressure": 1010, "humidity": 79, "tide": 1.0, "sunrise": "06:15", "sunset": "18:21", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-
-    # --- Tamil Nadu ---
-    {"id": "kanyakumari", "name": "Kanyakumari", "lat": 8.0883, "lng": 77.5385, "waveHeight": 2.3, "windSpeed": 28.0, "seaTemperature": 28.7, "visibility": 9.0, "pressure": 1010, "humidity": 82, "tide": 1.4, "sunrise": "06:25", "sunset": "18:30", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "tuticorin", "name": "Tuticorin (Thoothukudi)", "lat": 8.7642, "lng": 78.1348, "waveHeight": 1.4, "windSpeed": 19.0, "seaTemperature": 29.3, "visibility": 13.0, "pressure": 1011, "humidity": 74, "tide": 0.9, "sunrise": "06:22", "sunset": "18:27", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "rameswaram", "name": "Rameswaram", "lat": 9.2876, "lng": 79.3129, "waveHeight": 1.1, "windSpeed": 12.0, "seaTemperature": 29.5, "visibility": 15.0, "pressure": 1011, "humidity": 76, "tide": 0.8, "sunrise": "06:15", "sunset": "18:22", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "nagapattinam", "name": "Nagapattinam", "lat": 10.7656, "lng": 79.8424, "waveHeight": 1.5, "windSpeed": 16.0, "seaTemperature": 29.2, "visibility": 11.0, "pressure": 1010, "humidity": 79, "tide": 0.9, "sunrise": "06:12", "sunset": "18:18", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "karaikal", "name": "Karaikal", "lat": 10.9254, "lng": 79.8380, "waveHeight": 1.4, "windSpeed": 15.0, "seaTemperature": 29.3, "visibility": 12.0, "pressure": 1011, "humidity": 78, "tide": 0.8, "sunrise": "06:11", "sunset": "18:17", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "cuddalore", "name": "Cuddalore", "lat": 11.7480, "lng": 79.7714, "waveHeight": 1.3, "windSpeed": 14.0, "seaTemperature": 29.1, "visibility": 13.0, "pressure": 1011, "humidity": 77, "tide": 1.0, "sunrise": "06:10", "sunset": "18:16", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "puducherry", "name": "Puducherry", "lat": 11.9416, "lng": 79.8083, "waveHeight": 1.4, "windSpeed": 15.0, "seaTemperature": 29.2, "visibility": 12.0, "pressure": 1012, "humidity": 76, "tide": 0.9, "sunrise": "06:09", "sunset": "18:15", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "chennai", "name": "Chennai", "lat": 13.0827, "lng": 80.2707, "waveHeight": 1.4, "windSpeed": 15.0, "seaTemperature": 29.1, "visibility": 12.0, "pressure": 1010, "humidity": 80, "tide": 0.9, "sunrise": "06:10", "sunset": "18:15", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "kasimedu", "name": "Kasimedu Fishing Harbor", "lat": 13.1251, "lng": 80.2982, "waveHeight": 1.3, "windSpeed": 15.0, "seaTemperature": 29.1, "visibility": 11.0, "pressure": 1010, "humidity": 81, "tide": 0.9, "sunrise": "06:10", "sunset": "18:15", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "ennore", "name": "Ennore Creek", "lat": 13.2120, "lng": 80.3236, "waveHeight": 1.2, "windSpeed": 14.0, "seaTemperature": 29.2, "visibility": 10.0, "pressure": 1010, "humidity": 82, "tide": 1.0, "sunrise": "06:09", "sunset": "18:14", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "pulicat", "name": "Pulicat", "lat": 13.4182, "lng": 80.3168, "waveHeight": 1.3, "windSpeed": 14.0, "seaTemperature": 29.1, "visibility": 11.0, "pressure": 1010, "humidity": 80, "tide": 1.1, "sunrise": "06:08", "sunset": "18:13", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-
-    # --- Andhra Pradesh ---
-    {"id": "krishnapatnam", "name": "Krishnapatnam", "lat": 14.2492, "lng": 80.1415, "waveHeight": 1.5, "windSpeed": 16.0, "seaTemperature": 29.0, "visibility": 10.0, "pressure": 1011, "humidity": 79, "tide": 1.2, "sunrise": "06:07", "sunset": "18:12", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "nizampatnam", "name": "Nizampatnam", "lat": 15.8973, "lng": 80.6698, "waveHeight": 1.4, "windSpeed": 15.0, "seaTemperature": 29.0, "visibility": 11.0, "pressure": 1010, "humidity": 79, "tide": 1.1, "sunrise": "06:06", "sunset": "18:13", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "machilipatnam", "name": "Machilipatnam", "lat": 16.1833, "lng": 81.1333, "waveHeight": 1.7, "windSpeed": 16.0, "seaTemperature": 29.0, "visibility": 11.0, "pressure": 1009, "humidity": 81, "tide": 1.3, "sunrise": "06:08", "sunset": "18:18", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "kakinada", "name": "Kakinada", "lat": 16.9891, "lng": 82.2475, "waveHeight": 1.6, "windSpeed": 18.0, "seaTemperature": 28.8, "visibility": 12.0, "pressure": 1011, "humidity": 78, "tide": 1.2, "sunrise": "06:03", "sunset": "18:12", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "visakhapatnam", "name": "Visakhapatnam", "lat": 17.6868, "lng": 83.2185, "waveHeight": 2.1, "windSpeed": 25.5, "seaTemperature": 28.4, "visibility": 10.0, "pressure": 1012, "humidity": 78, "tide": 1.2, "sunrise": "06:05", "sunset": "18:20", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "bheemili", "name": "Bheemunipatnam", "lat": 17.8893, "lng": 83.4542, "waveHeight": 2.2, "windSpeed": 26.0, "seaTemperature": 28.3, "visibility": 9.0, "pressure": 1011, "humidity": 79, "tide": 1.2, "sunrise": "06:04", "sunset": "18:19", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "kalingapatnam", "name": "Kalingapatnam", "lat": 18.3333, "lng": 84.1167, "waveHeight": 2.0, "windSpeed": 23.0, "seaTemperature": 28.5, "visibility": 10.0, "pressure": 1010, "humidity": 80, "tide": 1.3, "sunrise": "06:02", "sunset": "18:16", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-
-    # --- Odisha ---
-    {"id": "gopalpur", "name": "Gopalpur", "lat": 19.2618, "lng": 84.9082, "waveHeight": 2.5, "windSpeed": 28.0, "seaTemperature": 28.2, "visibility": 8.0, "pressure": 1009, "humidity": 82, "tide": 1.4, "sunrise": "06:01", "sunset": "18:14", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "puri", "name": "Puri Beach", "lat": 19.7983, "lng": 85.8245, "waveHeight": 2.8, "windSpeed": 32.0, "seaTemperature": 28.1, "visibility": 7.0, "pressure": 1008, "humidity": 85, "tide": 1.6, "sunrise": "05:58", "sunset": "18:12", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "paradip", "name": "Paradip", "lat": 20.2638, "lng": 86.6669, "waveHeight": 3.2, "windSpeed": 40.0, "seaTemperature": 28.0, "visibility": 5.0, "pressure": 1006, "humidity": 88, "tide": 1.8, "sunrise": "05:55", "sunset": "18:10", "status": "DO NOT GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "dhamra", "name": "Dhamra Port", "lat": 20.7937, "lng": 86.9535, "waveHeight": 2.4, "windSpeed": 26.0, "seaTemperature": 28.1, "visibility": 9.0, "pressure": 1009, "humidity": 83, "tide": 1.9, "sunrise": "05:56", "sunset": "18:11", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "chandipur", "name": "Chandipur", "lat": 21.4429, "lng": 87.0519, "waveHeight": 1.5, "windSpeed": 18.0, "seaTemperature": 28.3, "visibility": 10.0, "pressure": 1010, "humidity": 80, "tide": 2.2, "sunrise": "05:54", "sunset": "18:09", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-
-    # --- West Bengal ---
-    {"id": "digha", "name": "Digha Coast", "lat": 21.6266, "lng": 87.5074, "waveHeight": 1.6, "windSpeed": 18.0, "seaTemperature": 28.6, "visibility": 9.0, "pressure": 1009, "humidity": 84, "tide": 2.0, "sunrise": "05:52", "sunset": "18:08", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "bakkhali", "name": "Bakkhali", "lat": 21.5647, "lng": 88.2618, "waveHeight": 1.8, "windSpeed": 20.0, "seaTemperature": 28.5, "visibility": 10.0, "pressure": 1010, "humidity": 82, "tide": 2.1, "sunrise": "05:50", "sunset": "18:05", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "haldia", "name": "Haldia", "lat": 22.0667, "lng": 88.0698, "waveHeight": 1.3, "windSpeed": 14.0, "seaTemperature": 28.8, "visibility": 8.0, "pressure": 1010, "humidity": 85, "tide": 2.5, "sunrise": "05:50", "sunset": "18:05", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "sagar", "name": "Sagar Island", "lat": 21.7317, "lng": 88.1362, "waveHeight": 1.9, "windSpeed": 22.0, "seaTemperature": 28.4, "visibility": 9.0, "pressure": 1008, "humidity": 86, "tide": 2.3, "sunrise": "05:51", "sunset": "18:06", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    
-    # --- Andaman & Nicobar / Lakshadweep ---
-    {"id": "portblair", "name": "Port Blair (Andaman)", "lat": 11.6234, "lng": 92.7265, "waveHeight": 2.2, "windSpeed": 25.0, "seaTemperature": 29.5, "visibility": 10.0, "pressure": 1009, "humidity": 85, "tide": 1.5, "sunrise": "05:30", "sunset": "17:40", "status": "Caution", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "havelock", "name": "Havelock Island", "lat": 11.9761, "lng": 92.9876, "waveHeight": 2.0, "windSpeed": 22.0, "seaTemperature": 29.6, "visibility": 11.0, "pressure": 1010, "humidity": 83, "tide": 1.4, "sunrise": "05:28", "sunset": "17:39", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "kavaratti", "name": "Kavaratti (Lakshadweep)", "lat": 10.5667, "lng": 72.6369, "waveHeight": 1.5, "windSpeed": 15.0, "seaTemperature": 29.8, "visibility": 14.0, "pressure": 1011, "humidity": 75, "tide": 1.1, "sunrise": "06:45", "sunset": "18:45", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-    {"id": "minicoy", "name": "Minicoy Island", "lat": 8.2818, "lng": 73.0489, "waveHeight": 1.6, "windSpeed": 17.0, "seaTemperature": 29.7, "visibility": 13.0, "pressure": 1010, "humidity": 76, "tide": 1.2, "sunrise": "06:40", "sunset": "18:40", "status": "SAFE TO GO", "advisory": "", "windDirection": 0.0, "waveDirection": 0.0},
-]
+# Harbors and landing centers we cover; edits to the file are picked up without a restart
+LOCATIONS_FILE = os.getenv("LOCATIONS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "locations.csv"))
+location_registry = LocationRegistry.load(LOCATIONS_FILE)
 
 
-import asyncio
+async def refresh_location(loc: dict) -> dict:
+    """Fetches fresh telemetry under the site's current registry name and position.
+
+    The fetch works on a copy taken before it started, so a registry reload that
+    lands meanwhile would otherwise be overwritten by the stale metadata.
+    """
+    fetched = await fetch_realtime_marine_data(loc)
+    site = location_registry.get(loc["id"])
+    return fetched if site is None else registry_record(site, fetched)
+
+
+scheduler = RefreshScheduler(refresh_location, ttl=REFRESH_TTL_SECONDS, concurrency=REFRESH_CONCURRENCY)
+sync_log = SyncLog(scheduler.state)
+
+
+async def stamp_version(previous: Optional[dict], loc: dict):
+    """Versions the record for delta sync; runs first so the version is saved and shared with it."""
+    sync_log.stamp(previous, loc)
+
+scheduler.add_listener(stamp_version)
+
+
+async def save_location(previous: Optional[dict], loc: dict):
+    """Persists a refreshed location to MongoDB; without it, scheduler.state is the only copy."""
+    if not MONGODB_AVAILABLE or not is_writer():
+        return
+    # Copy so pymongo doesn't stamp an ObjectId `_id` onto the shared record
+    doc = dict(loc)
+    doc["position"] = {"type": "Point", "coordinates": [loc["lng"], loc["lat"]]}
+    await db.locations.replace_one({"id": loc["id"]}, doc, upsert=True)
+
+scheduler.add_listener(save_location)
+
+history_store = MemoryHistoryStore()
+
+
+async def record_history(previous: Optional[dict], loc: dict):
+    """Appends every fresh upstream observation to the history store."""
+    if MONGODB_AVAILABLE and not is_writer():
+        return
+    if loc.get("updatedAt") and loc.get("updatedAt") != (previous or {}).get("updatedAt"):
+        await history_store.append(loc)
+
+scheduler.add_listener(record_history)
+
+
+# Fields the map and list views need; everything heavier lives in the full view
+SUMMARY_FIELDS = {"id", "name", "lat", "lng", "status", "advisory", "waveHeight", "windSpeed", "windDirection", "updatedAt", "stale", "version"}
+
+
+def location_view(view: str, fields: Optional[str]) -> str:
+    """Normalizes the `view`/`fields` query params into a cache view key."""
+    if not fields:
+        return view
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(LocationData.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return "fields:" + ",".join(sorted(requested | {"id"}))
+
+
+def view_fields(view: str) -> Optional[set]:
+    if view == "summary":
+        return SUMMARY_FIELDS
+    if view.startswith("fields:"):
+        return set(view[len("fields:"):].split(","))
+    return None
+
+
+SYNC_MEDIA_TYPES = {"json": "application/json", "msgpack": "application/msgpack"}
+
+
+def encode_sync(changes: dict, format: str) -> bytes:
+    if format == "msgpack":
+        return encode_msgpack(changes)
+    return json.dumps(changes, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def build_location_response(resource: str, view: str):
+    """Encodes a cached resource (`locations`, `location:<id>`, `windows` or `sync`) in the given view."""
+    if resource == "sync":
+        # view is `reset:<format>`: the full-fleet answer every out-of-date token gets
+        reset = sync_log.changes(-1)
+        return encode_sync(reset, view.split(":", 1)[1]), float("inf")
+    if resource == "windows":
+        # view is `opening:<hours>`
+        now = time.time()
+        opening = departure_windows.opening_within(now, int(view.split(":", 1)[1]))
+        return json.dumps(opening, separators=(",", ":")).encode(), departure_windows.next_boundary(now)
+    if resource == "locations":
+        # The fleet body is stitched together from the per-location encodings
+        parts = [location_cache.get(f"location:{location_id}", view) for location_id in scheduler.state]
+        body = b"[" + b",".join(part.body for part in parts) + b"]"
+        return body, min((part.expires_at for part in parts), default=float("inf"))
+
+    loc = scheduler.state.get(resource.split(":", 1)[1])
+    if loc is None:
+        return None
+    if view == "forecast":
+        forecast = {"id": loc["id"], "updatedAt": loc.get("updatedAt"), "forecast14": loc.get("forecast14") or []}
+        return json.dumps(forecast, separators=(",", ":"), ensure_ascii=False).encode(), float("inf")
+
+    if view == "windows":
+        # Past hours drop off the timeline at each hour boundary
+        now = time.time()
+        windows = departure_windows.timeline(loc["id"], now) or {"id": loc["id"], "openNow": False, "nextWindow": None, "windows": [], "hourly": []}
+        return json.dumps(windows, separators=(",", ":")).encode(), departure_windows.next_boundary(now, loc["id"])
+
+    annotated = scheduler.annotate(loc)
+    # A fresh record must be re-encoded once its stale flag flips
+    expires_at = float("inf") if annotated["stale"] else scheduler.stale_at(loc)
+    return LocationData(**annotated).model_dump_json(include=view_fields(view)).encode(), expires_at
+
+location_cache = ResponseCache(build_location_response)
+
+
+async def invalidate_location_cache(previous: Optional[dict], loc: dict):
+    location_cache.invalidate("locations", f"location:{loc['id']}", "windows", "sync")
+
+scheduler.add_listener(invalidate_location_cache)
+
+spatial_index = GridIndex()
+
+
+async def index_location(previous: Optional[dict], loc: dict):
+    spatial_index.upsert(loc["id"], loc["lat"], loc["lng"])
+
+scheduler.add_listener(index_location)
+
+# Per-client queue bound; a client that falls this far behind is told to resync
+status_hub = StatusHub(queue_size=int(os.getenv("STREAM_QUEUE_SIZE", "64")))
+STREAM_HEARTBEAT_SECONDS = 15.0
+
+
+async def publish_location_changes(previous: Optional[dict], loc: dict):
+    event = diff_location(previous, loc)
+    if event is not None:
+        status_hub.publish(event)
+
+scheduler.add_listener(publish_location_changes)
+
+# Built lazily on first query; afterwards refreshes only touch the cells a harbor feeds
+hazard_field = HazardField(CAUTION_LIMITS, DO_NOT_GO_LIMITS, resolution=float(os.getenv("HAZARD_GRID_RESOLUTION", "0.05")))
+
+
+async def update_hazard_field(previous: Optional[dict], loc: dict):
+    hazard_field.update(loc)
+
+scheduler.add_listener(update_hazard_field)
+
+# Results are cached per quantized route geometry and hazard field version
+route_evaluator = RouteEvaluator(hazard_field)
+
+# Hourly safety timeline and safe departure windows, recomputed once per refresh
+departure_windows = DepartureWindows(CAUTION_LIMITS, DO_NOT_GO_LIMITS)
+
+
+async def update_departure_windows(previous: Optional[dict], loc: dict):
+    departure_windows.update(loc)
+
+scheduler.add_listener(update_departure_windows)
+
+
+# Last good telemetry on local disk, so a restart can serve before reaching Mongo or WeatherAPI
+snapshot_store = SnapshotStore(os.getenv("SNAPSHOT_PATH", "telemetry.snapshot"))
+snapshot_writer = SnapshotWriter(snapshot_store, lambda: list(scheduler.state.values()), interval=float(os.getenv("SNAPSHOT_INTERVAL_SECONDS", "30")))
+warm_up_task: Optional[asyncio.Task] = None
+
+
+async def mark_snapshot_dirty(previous: Optional[dict], loc: dict):
+    if is_writer():
+        snapshot_writer.mark_dirty()
+
+scheduler.add_listener(mark_snapshot_dirty)
+
+# Lets several workers (SHARED_CACHE=local) or hosts (SHARED_CACHE=mongo) share one refresher
+SHARED_CACHE = os.getenv("SHARED_CACHE", "").lower()
+shared_sync: Optional[SharedSync] = None
+
+
+def is_writer() -> bool:
+    """Whether this process refreshes and persists telemetry: always, unless it follows a shared-cache leader."""
+    return shared_sync is None or shared_sync.is_leader
+
+
+async def share_location(previous: Optional[dict], loc: dict):
+    if shared_sync is not None and loc.get("updatedAt") != (previous or {}).get("updatedAt"):
+        shared_sync.offer(loc)
+
+scheduler.add_listener(share_location)
+
+
+async def apply_shared(records: List[dict]):
+    """Takes telemetry the leader refreshed; the leader's own records come back too and are skipped as not newer."""
+    for remote in records:
+        site = location_registry.get(remote["id"])
+        local = scheduler.state.get(remote["id"])
+        if site is None or local is None:
+            continue
+        if parse_timestamp(remote.get("updatedAt")) > parse_timestamp(local.get("updatedAt")):
+            await scheduler.apply(registry_record(site, remote))
+
+
+async def open_shared_store():
+    if SHARED_CACHE == "mongo":
+        if MONGODB_AVAILABLE:
+            store = MongoSharedStore(db)
+            await store.ensure_indexes()
+            return store
+        print("SHARED_CACHE=mongo needs MongoDB; sharing through the local store instead.")
+    return LocalSharedStore(os.getenv("SHARED_CACHE_PATH") or None)
+
+
+async def start_refreshing():
+    """Brings MongoDB in line with the registry file, then starts live refreshes."""
+    try:
+        # The registry file is the source of truth for which sites exist and where they are
+        stored_ids = await db.locations.distinct("id") if MONGODB_AVAILABLE else []
+        await sync_registry(location_registry, [location_id for location_id in stored_ids if location_id not in location_registry])
+    except Exception as e:
+        print(f"Failed to sync the location registry to MongoDB: {str(e)}")
+    # Records keep their updatedAt, so only the expired ones are re-fetched, stalest first
+    scheduler.start()
+
+
+def index_record(loc: dict):
+    """Feeds a record that was loaded rather than refreshed into the derived indexes."""
+    spatial_index.upsert(loc["id"], loc["lat"], loc["lng"])
+    hazard_field.update(loc)
+    departure_windows.update(loc)
+
+
+def registry_record(site, stored: Optional[dict]) -> dict:
+    """Stored telemetry for a site under its current registry name and position (baseline if never fetched)."""
+    if stored is None:
+        return location_registry.seed(site)
+    return {**stored, **location_registry.metadata(site)}
+
+
+async def sync_registry(sites, removed: List[str] = ()):
+    """Upserts site metadata into MongoDB in one bulk write; telemetry is only set on insert."""
+    if not MONGODB_AVAILABLE:
+        return
+    ops = []
+    for site in sites:
+        metadata = location_registry.metadata(site)
+        baseline = {field: value for field, value in location_registry.seed(site).items() if field not in metadata}
+        metadata["position"] = {"type": "Point", "coordinates": [metadata["lng"], metadata["lat"]]}
+        ops.append(UpdateOne({"id": site.id}, {"$set": metadata, "$setOnInsert": baseline}, upsert=True))
+    if removed:
+        ops.append(DeleteMany({"id": {"$in": list(removed)}}))
+    if ops:
+        await db.locations.bulk_write(ops, ordered=False)
+
+
+async def reload_registry(previous: LocationRegistry, newer: LocationRegistry):
+    """Applies an edited registry file: new sites are fetched, removed ones dropped, moved ones re-indexed."""
+    global location_registry
+    location_registry = newer
+    added, removed, changed = previous.diff(newer)
+    for location_id in removed:
+        scheduler.remove(location_id)
+        spatial_index.remove(location_id)
+        hazard_field.remove(location_id)
+        departure_windows.remove(location_id)
+        sync_log.remove(location_id)
+        location_cache.invalidate(f"location:{location_id}")
+
+    updated = []
+    for location_id in added + changed:
+        record = registry_record(newer.get(location_id), scheduler.state.get(location_id))
+        sync_log.stamp(scheduler.state.get(location_id), record)
+        event = diff_location(scheduler.state.get(location_id), record)
+        updated.append(record)
+        if event is not None:
+            status_hub.publish(event)
+    # Added sites have no updatedAt yet, so the scheduler fetches them right away
+    scheduler.load(updated)
+    for loc in updated:
+        index_record(loc)
+    location_cache.invalidate("locations", "windows", "sync", *(f"location:{loc['id']}" for loc in updated))
+    if not is_writer():
+        # Every worker watches the file itself; only the leader writes the result back
+        print(f"Location registry reloaded: {len(added)} added, {len(removed)} removed, {len(changed)} changed.")
+        return
+    snapshot_writer.mark_dirty()
+    try:
+        await sync_registry([newer.get(location_id) for location_id in added + changed], removed)
+    except Exception as e:
+        print(f"Failed to sync the location registry to MongoDB: {str(e)}")
+    print(f"Location registry reloaded: {len(added)} added, {len(removed)} removed, {len(changed)} changed.")
+
+registry_watcher = RegistryWatcher(location_registry, reload_registry, interval=float(os.getenv("LOCATIONS_RELOAD_SECONDS", "10")))
+
 
 @app.on_event("startup")
 async def startup_db():
-    global MONGODB_AVAILABLE
+    global warm_up_task
+    # Serve the snapshot (stale-marked where old) right away; Mongo and WeatherAPI are reached in the background
+    cached = {loc["id"]: loc for loc in snapshot_store.load()}
+    scheduler.load(registry_record(site, cached.get(site.id)) for site in location_registry)
+    for loc in scheduler.state.values():
+        index_record(loc)
+    sync_log.start()
+    served = sum(site.id in cached for site in location_registry)
+    print(f"Serving {served} of {len(location_registry)} locations from the telemetry snapshot; warming up in the background.")
+    sos_pipeline.start()
+    snapshot_writer.start()
+    registry_watcher.start()
+    warm_up_task = asyncio.ensure_future(warm_up())
+
+
+async def warm_up():
+    """Connects to Mongo, adopts any records newer than the snapshot, then starts live refreshes."""
+    global MONGODB_AVAILABLE, history_store, shared_sync
+    stored = {}
     try:
         # Check connection
         await client.server_info()
         MONGODB_AVAILABLE = True
-        count = await db.locations.count_documents({})
-        if count == 0:
-            print("Seeding MongoDB locations database with realtime telemetry...")
-            async_tasks = [fetch_realtime_marine_data(loc) for loc in LOCATIONS]
-            enriched_locations = await asyncio.gather(*async_tasks)
-            await db.locations.insert_many(enriched_locations)
-            print(f"Successfully seeded {len(enriched_locations)} enriched locations into the DB!")
+        async for doc in db.locations.find({}, {"_id": 0}):
+            stored[doc["id"]] = doc
+        history_store = MongoHistoryStore(db)
+        await history_store.ensure_collection()
+        # Lets other consumers run $near / $geoWithin queries on the collection directly
+        await db.locations.create_index([("position", "2dsphere")])
     except Exception as e:
         print("⚠️ MongoDB connection failed or not configured. Falling back to in-memory mode.", str(e))
         MONGODB_AVAILABLE = False
-        print("Seeding Memory locations database with realtime telemetry...")
-        async_tasks = [fetch_realtime_marine_data(loc) for loc in LOCATIONS]
-        MOCK_MEM_DB["locations"] = await asyncio.gather(*async_tasks)
+
+    # Another instance may have refreshed these since our snapshot was written
+    newer = [
+        registry_record(location_registry.get(location_id), doc) for location_id, doc in stored.items()
+        if location_id in scheduler.state
+        and parse_timestamp(doc.get("updatedAt")) > parse_timestamp(scheduler.state[location_id].get("updatedAt"))
+    ]
+    if newer:
+        for loc in newer:
+            sync_log.stamp(scheduler.state[loc["id"]], loc)
+        scheduler.load(newer)
+        for loc in newer:
+            index_record(loc)
+        location_cache.invalidate("locations", "windows", "sync", *(f"location:{loc['id']}" for loc in newer))
+        snapshot_writer.mark_dirty()
+
+    if SHARED_CACHE:
+        # Only the lease holder fetches from WeatherAPI; every worker reads what it publishes
+        shared_sync = SharedSync(
+            await open_shared_store(), apply_shared, start_refreshing, scheduler.stop,
+            interval=float(os.getenv("SHARED_CACHE_POLL_SECONDS", "0.5")),
+            lease_ttl=float(os.getenv("SHARED_CACHE_LEASE_SECONDS", "15")),
+        )
+        shared_sync.start()
+    else:
+        await start_refreshing()
+
+
+@app.on_event("shutdown")
+async def shutdown_scheduler():
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    await registry_watcher.stop()
+    await scheduler.stop()
+    if shared_sync is not None:
+        # Publishes the last refreshes and frees the lease so another worker takes over at once
+        await shared_sync.stop()
+    await sos_pipeline.stop()
+    await snapshot_writer.stop()
+    await weather_api.aclose()
+    profiler.stop()
+
 
 @app.get("/api/locations", response_model=List[LocationData])
-async def get_locations():
-    if not MONGODB_AVAILABLE:
-        return MOCK_MEM_DB["locations"]
-    cursor = db.locations.find({}, {"_id": 0})
-    return await cursor.to_list(length=100)
+async def get_locations(request: Request, view: Literal["full", "summary"] = "full", fields: Optional[str] = None):
+    """All locations. `view=summary` or `fields=a,b` return slim records; the forecast lives at /forecast."""
+    # Served from pre-encoded bytes; rebuilt only when a refresh lands
+    return location_cache.respond(request, "locations", location_view(view, fields))
+
+class NearbyLocation(LocationData):
+    distanceKm: float
+
+
+def nearby_locations(matches: list, view: str) -> Response:
+    """Stitches the cached per-location encodings together, each with its `distanceKm` spliced in."""
+    parts = [
+        b'{"distanceKm":%s,' % json.dumps(round(distance, 2)).encode() + location_cache.get(f"location:{location_id}", view).body[1:]
+        for distance, location_id in matches
+    ]
+    return Response(content=b"[" + b",".join(parts) + b"]", media_type="application/json")
+
+@app.get("/api/locations/nearest", response_model=List[NearbyLocation])
+async def get_nearest_locations(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=50),
+    status: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
+    fields: Optional[str] = None,
+):
+    """k nearest harbors to a point, optionally only those with the given safety status.
+
+    `view=summary` or `fields=a,b` keep the payload small, e.g. for an SOS "nearest safe harbor" lookup.
+    """
+    cache_view = location_view(view, fields)
+    predicate = (lambda location_id: scheduler.state[location_id]["status"] == status) if status else None
+    return nearby_locations(spatial_index.nearest(lat, lng, k, predicate), cache_view)
+
+@app.get("/api/locations/radius", response_model=List[NearbyLocation])
+async def get_locations_in_radius(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    km: float = Query(..., gt=0, le=2000),
+    view: Literal["full", "summary"] = "full",
+    fields: Optional[str] = None,
+):
+    return nearby_locations(spatial_index.within_radius(lat, lng, km), location_view(view, fields))
+
+@app.get("/api/locations/bbox", response_model=List[LocationData])
+async def get_locations_in_bbox(
+    minLat: float = Query(..., ge=-90, le=90),
+    minLng: float = Query(..., ge=-180, le=180),
+    maxLat: float = Query(..., ge=-90, le=90),
+    maxLng: float = Query(..., ge=-180, le=180),
+    view: Literal["full", "summary"] = "full",
+    fields: Optional[str] = None,
+):
+    """Locations inside a map viewport, stitched from the cached per-location encodings."""
+    cache_view = location_view(view, fields)
+    parts = [location_cache.get(f"location:{location_id}", cache_view) for location_id in spatial_index.within_bbox(minLat, minLng, maxLat, maxLng)]
+    return Response(content=b"[" + b",".join(part.body for part in parts) + b"]", media_type="application/json")
 
 @app.get("/api/locations/{location_id}", response_model=LocationData)
-async def get_location(location_id: str):
-    if not MONGODB_AVAILABLE:
-        loc = next((l for l in MOCK_MEM_DB["locations"] if l["id"] == location_id), None)
-        return loc or {}
-    loc = await db.locations.find_one({"id": location_id}, {"_id": 0})
-    return loc or {}
+async def get_location(location_id: str, request: Request, view: Literal["full", "summary"] = "full", fields: Optional[str] = None):
+    response = location_cache.respond(request, f"location:{location_id}", location_view(view, fields))
+    if response is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return response
+
+@app.get("/api/locations/{location_id}/forecast")
+async def get_location_forecast(location_id: str, request: Request):
+    """The 14-day forecast on its own, so location payloads don't need to carry it."""
+    response = location_cache.respond(request, f"location:{location_id}", "forecast")
+    if response is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return response
+
+@app.get("/api/locations/{location_id}/windows")
+async def get_location_windows(location_id: str, request: Request):
+    """Hourly safety timeline from now on, plus the upcoming SAFE TO GO departure windows."""
+    response = location_cache.respond(request, f"location:{location_id}", "windows")
+    if response is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return response
+
+@app.get("/api/windows/opening")
+async def get_opening_windows(request: Request, hours: int = Query(6, ge=1, le=72)):
+    """Harbors with a safe departure window open now or opening within `hours`, soonest first."""
+    return location_cache.respond(request, "windows", f"opening:{hours}")
+
+
+@app.get("/api/sync")
+async def sync_locations(request: Request, since: int = Query(0, ge=0), format: Literal["json", "msgpack"] = "json"):
+    """Records and fields changed since a previous sync's `version`, plus the ids of removed sites.
+
+    Start from since=0 (a full reset) and send back each response's `version`.
+    When nothing changed the answer is an empty 204 with the token in X-Sync-Version.
+    """
+    if format == "msgpack" and msgpack is None:
+        raise HTTPException(status_code=406, detail="MessagePack encoding is not available on this server")
+    if since < sync_log.floor:
+        response = location_cache.respond(request, "sync", f"reset:{format}", media_type=SYNC_MEDIA_TYPES[format])
+        # The cached reset is rebuilt on every change, so it is always at the current version
+        response.headers["X-Sync-Version"] = str(sync_log.version)
+        return response
+    changes = sync_log.changes(since)
+    if changes is None:
+        return Response(status_code=204, headers={"X-Sync-Version": str(max(since, sync_log.version))})
+    return Response(content=encode_sync(changes, format), media_type=SYNC_MEDIA_TYPES[format], headers={"X-Sync-Version": str(changes["version"])})
+
+@app.get("/api/hazard/point")
+async def get_hazard_at_point(lat: float = Query(..., ge=-90, le=90), lng: float = Query(..., ge=-180, le=180)):
+    """Interpolated conditions and safety class anywhere on the grid, including between harbors."""
+    await hazard_field.ensure_built_async()
+    conditions = hazard_field.at(lat, lng)
+    if conditions is None:
+        raise HTTPException(status_code=404, detail="Point is outside the hazard grid")
+    return dict(conditions, lat=lat, lng=lng)
+
+@app.get("/api/hazard/tile")
+async def get_hazard_tile(
+    minLat: float = Query(..., ge=-90, le=90),
+    minLng: float = Query(..., ge=-180, le=180),
+    maxLat: float = Query(..., ge=-90, le=90),
+    maxLng: float = Query(..., ge=-180, le=180),
+    step: int = Query(1, ge=1, le=64),
+):
+    """Run-length encoded raster of hazard classes for a map viewport."""
+    rows = (maxLat - minLat) / (hazard_field.resolution * step)
+    cols = (maxLng - minLng) / (hazard_field.resolution * step)
+    if rows * cols > 512 * 512:
+        raise HTTPException(status_code=400, detail="Tile too large, increase step")
+    await hazard_field.ensure_built_async()
+    return hazard_field.tile(minLat, minLng, maxLat, maxLng, step)
+
+def parse_time_param(value: str, name: str) -> float:
+    try:
+        return parse_iso(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: expected an ISO 8601 time such as 2026-10-17T06:00:00+05:30")
+
+
+Latitude = Annotated[float, Field(ge=-90, le=90, allow_inf_nan=False)]
+Longitude = Annotated[float, Field(ge=-180, le=180, allow_inf_nan=False)]
+
+class RouteEvaluationRequest(BaseModel):
+    routes: List[List[Tuple[Latitude, Longitude]]] = Field(..., min_length=1, max_length=2000)
+    departure: Optional[str] = None
+    speedKmh: float = Field(12.0, gt=0, le=100)
+
+@app.post("/api/routes/evaluate")
+async def evaluate_routes(req: RouteEvaluationRequest):
+    """Scores one or many planned trips (each a [[lat, lng], ...] polyline) for a departure time.
+
+    Each result has a GO / CAUTION / NO GO decision, the worst segment and the
+    time spent in Caution or worse conditions at the given boat speed.
+    """
+    for route in req.routes:
+        if not 2 <= len(route) <= 500:
+            raise HTTPException(status_code=400, detail="Each route needs between 2 and 500 points")
+    # Every route is resampled every spacing_km, so memory grows with total length
+    lengths = route_lengths_km(req.routes)
+    if lengths.max() > MAX_ROUTE_KM:
+        raise HTTPException(status_code=400, detail=f"Each route must be at most {MAX_ROUTE_KM:.0f} km long")
+    if route_evaluator.sample_count(lengths) > MAX_REQUEST_SAMPLES:
+        raise HTTPException(status_code=400, detail="Routes too long in total, split them across requests")
+    departure = parse_time_param(req.departure, "departure") if req.departure else time.time()
+    await hazard_field.ensure_built_async()
+    return route_evaluator.evaluate(req.routes, departure, req.speedKmh)
+
+def parse_subscription(ids: Optional[str], bbox: Optional[str]):
+    """Parses `ids=a,b` and `bbox=minLat,minLng,maxLat,maxLng` stream filters."""
+    id_set = {location_id.strip() for location_id in ids.split(",") if location_id.strip()} if ids else None
+    box = None
+    if bbox:
+        try:
+            box = tuple(float(part) for part in bbox.split(","))
+        except ValueError:
+            box = ()
+        if len(box) != 4:
+            raise HTTPException(status_code=400, detail="bbox must be minLat,minLng,maxLat,maxLng")
+    return id_set, box
+
+@app.get("/api/stream")
+async def stream_location_changes(request: Request, ids: Optional[str] = None, bbox: Optional[str] = None):
+    """Server-sent events carrying changed fields, status transitions and new alerts."""
+    sub = status_hub.subscribe(*parse_subscription(ids, bbox))
+
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                event = await sub.next_event(STREAM_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+        finally:
+            status_hub.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/api/ws")
+async def location_changes_socket(websocket: WebSocket, ids: Optional[str] = None, bbox: Optional[str] = None):
+    """Same events as /api/stream; clients may send {"ids": [...], "bbox": [...]} to change their filter."""
+    try:
+        sub = status_hub.subscribe(*parse_subscription(ids, bbox))
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+
+    async def read_filters():
+        while True:
+            message = await websocket.receive_json()
+            try:
+                box = tuple(float(part) for part in message["bbox"]) if message.get("bbox") else None
+                if box is not None and len(box) != 4:
+                    raise ValueError("bbox must have 4 values")
+                status_hub.update(sub, set(message.get("ids") or []), box)
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+
+    reader = asyncio.ensure_future(read_filters())
+    try:
+        while not reader.done():
+            event = await sub.next_event(STREAM_HEARTBEAT_SECONDS)
+            await websocket.send_json(event or {"type": "ping"})
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        reader.cancel()
+        status_hub.unsubscribe(sub)
 
 class SOSRequest(BaseModel):
     contactNumber: str
@@ -278,53 +872,171 @@ class SOSRequest(BaseModel):
     lng: float
     message: Optional[str] = "Emergency SOS Alert"
 
-@app.post("/api/sos")
-async def send_sos_alert(req: SOSRequest):
-    alert_doc = {
-        "contactNumber": req.contactNumber,
-        "lat": req.lat,
-        "lng": req.lng,
-        "message": req.message,
-        "timestamp": datetime.datetime.now().isoformat()
-    }
-    
-    if MONGODB_AVAILABLE:
-        result = await db.sos_alerts.insert_one(alert_doc)
-        alert_id = str(result.inserted_id)
-    else:
-        MOCK_MEM_DB["sos"].append(alert_doc)
-        alert_id = str(len(MOCK_MEM_DB["sos"]))
-    
-    # Mock SMS sending
-    print("=" * 40)
-    print("🚨 [MOCK SMS ALERT SENT] 🚨")
-    print(f"To: {req.contactNumber}")
-    print(f"Location: Lat {req.lat}, Lng {req.lng}")
-    print(f"Message: {req.message}")
-    print("=" * 40)
-    
-    return {"status": "success", "alert_id": alert_id}
+async def store_sos_alerts(inserts: List[dict], updates: List[dict]):
+    """Writes one batch of new SOS alerts and updates (merged presses, dispatch latency) to stored ones."""
+    if not MONGODB_AVAILABLE:
+        # Updated alerts are the same dicts already appended, updated in place
+        MOCK_MEM_DB["sos"].extend(inserts)
+        return
+    ops = []
+    for alert in inserts:
+        doc = {key: value for key, value in alert.items() if not key.startswith("_") and key != "alert_id"}
+        # Upserted so a batch retried after a partial failure doesn't hit duplicate keys
+        ops.append(ReplaceOne({"_id": ObjectId(alert["alert_id"])}, doc, upsert=True))
+    for alert in updates:
+        update = {key: alert[key] for key in ("lat", "lng", "message", "lastSeen", "repeatCount", "dispatchLatencyMs") if key in alert}
+        ops.append(UpdateOne({"_id": ObjectId(alert["alert_id"])}, {"$set": update}))
+    if ops:
+        await db.sos_alerts.bulk_write(ops, ordered=False)
+
+sos_pipeline = SosPipeline(store_sos_alerts, ConsoleSmsGateway(), workers=int(os.getenv("SOS_WORKERS", "4")))
+
+@app.post("/api/sos", status_code=202)
+async def send_sos_alert(req: SOSRequest, idempotency_key: Optional[str] = Header(None)):
+    """Acknowledges immediately; storage and SMS fan-out happen in the SOS pipeline.
+
+    Resends with the same `Idempotency-Key`, or from the same contact in the same
+    area, return the original alert id with `duplicate: true`. That dedup is per
+    worker process.
+    """
+    alert_id, duplicate = sos_pipeline.submit(req.contactNumber, req.lat, req.lng, req.message, idempotency_key)
+    return {"status": "success", "alert_id": alert_id, "duplicate": duplicate}
+
+@app.get("/api/sos/stats")
+async def get_sos_stats():
+    return sos_pipeline.stats()
 
 @app.get("/api/history")
-def get_history():
-    # Generate some dummy history
+async def get_history(
+    response: Response,
+    location_id: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    bucket: Optional[Literal["hour", "day"]] = None,
+    limit: int = Query(20, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    """Recorded telemetry, newest first. `bucket` downsamples to hourly/daily min/max/mean.
+
+    Pages are chained by passing the `X-Next-Cursor` response header back as `cursor`.
+    """
+    range_start = parse_time_param(start, "start") if start else 0.0
+    range_end = parse_time_param(end, "end") if end else float("inf")
+    before = None
+    if cursor:
+        try:
+            cursor_ts, cursor_id = cursor.split(":", 1)
+            before = (float(cursor_ts), cursor_id)
+            if not math.isfinite(before[0]):
+                raise ValueError(cursor_ts)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if bucket:
+        if not location_id:
+            raise HTTPException(status_code=400, detail="location_id is required when bucketing history")
+        if before is not None:
+            range_end = min(range_end, before[0])
+        rows = await history_store.buckets(location_id, bucket, range_start, range_end, limit)
+    else:
+        rows = await history_store.samples(location_id, range_start, range_end, limit, before)
+
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = f"{rows[-1]['ts']!r}:{rows[-1]['locationId']}"
+
     history = []
-    base_date = datetime.datetime.now()
-    for i in range(20):
-        # alternate locations
-        loc = LOCATIONS[i % len(LOCATIONS)]
-        history.append({
-            "id": f"hist_{i}",
-            "date": (base_date - datetime.timedelta(days=i)).isoformat(),
-            "location": loc["name"],
-            "lat": loc["lat"],
-            "lng": loc["lng"],
-            "waveHeight": loc["waveHeight"] + (i * 0.1 % 0.5), # slight variation
-            "windSpeed": loc["windSpeed"] + (i % 5),
-            "seaTemperature": loc["seaTemperature"] - (i * 0.05 % 0.5),
-            "status": loc["status"]
+    for row in rows:
+        loc = scheduler.state.get(row["locationId"], {})
+        ts = row.pop("ts")
+        row.update({
+            "id": f"{row['locationId']}_{int(ts)}",
+            "date": to_iso(ts),
+            "location": loc.get("name", row["locationId"]),
+            "lat": loc.get("lat"),
+            "lng": loc.get("lng"),
         })
+        history.append(row)
     return history
 
+def count_locations() -> dict:
+    now = time.time()
+    stale = sum(scheduler.is_stale(loc, now) for loc in scheduler.state.values())
+    return {("stale",): stale, ("fresh",): len(scheduler.state) - stale}
+
+
+def cache_hit_ratio() -> dict:
+    total = location_cache.hits + location_cache.misses
+    return {(): location_cache.hits / total if total else 0.0}
+
+
+metrics_registry.gauge("marine_locations", "Tracked locations by freshness.", count_locations, ("state",))
+metrics_registry.counter_func(
+    "marine_response_cache_requests_total", "Location response cache lookups.",
+    lambda: {("hit",): location_cache.hits, ("miss",): location_cache.misses}, ("result",),
+)
+metrics_registry.gauge("marine_response_cache_hit_ratio", "Share of location response cache lookups served from cache.", cache_hit_ratio)
+metrics_registry.gauge(
+    "marine_upstream_circuit_open", "1 while the WeatherAPI circuit breaker is open or half-open.",
+    lambda: {(): 0 if weather_api.breaker.state == "closed" else 1},
+)
+metrics_registry.gauge(
+    "marine_shared_cache_leader", "1 while this process holds the shared refresher lease.",
+    lambda: {(): 1 if shared_sync is not None and shared_sync.is_leader else 0},
+)
+metrics_registry.gauge("marine_stream_subscribers", "Connected SSE/WebSocket clients.", lambda: {(): len(status_hub)})
+metrics_registry.gauge(
+    "marine_sos_queue_depth", "SOS alerts waiting to be stored or notified.",
+    lambda: {
+        ("writes",): sos_pipeline.stats()["pendingWrites"],
+        ("notifications",): sos_pipeline.stats()["pendingNotifications"],
+        ("retries",): sos_pipeline.stats()["retryingNotifications"],
+    },
+    ("queue",),
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class ProfilerRequest(BaseModel):
+    enabled: bool
+    intervalMs: float = Field(10.0, ge=1.0, le=1000.0)
+
+
+def require_admin(token: Optional[str]):
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Profiling is disabled; set ADMIN_TOKEN to enable it")
+    if token != expected:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/api/debug/profiler")
+async def set_profiler(req: ProfilerRequest, x_admin_token: Optional[str] = Header(None)):
+    """Starts (clearing earlier samples) or stops the sampling profiler on the event loop thread."""
+    require_admin(x_admin_token)
+    if req.enabled:
+        profiler.start(req.intervalMs / 1000)
+    else:
+        profiler.stop()
+    return {"running": profiler.running, "samples": profiler.samples}
+
+
+@app.get("/api/debug/profiler")
+async def get_profiler(format: Literal["top", "collapsed"] = "top", limit: int = Query(25, ge=1, le=500), x_admin_token: Optional[str] = Header(None)):
+    """Profile so far: hottest functions, or collapsed stacks for flamegraph tools."""
+    require_admin(x_admin_token)
+    if format == "collapsed":
+        return Response(content=profiler.collapsed(), media_type="text/plain")
+    return {
+        "running": profiler.running,
+        "samples": profiler.samples,
+        "intervalMs": profiler.interval * 1000,
+        "startedAt": to_iso(profiler.started_at) if profiler.started_at else None,
+        "functions": profiler.top(limit),
+    }
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,263 @@
+import bisect
+import collections
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+# Seconds; spans cache hits (sub-ms) through slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[Tuple[str, Tuple[str, ...], str, float]]:
+        """(suffix, label values, extra label, value) rows for the exposition."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(self.labels, values, extra)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self):
+        for values, value in list(self.values.items()):
+            yield "", values, "", value
+
+
+class Gauge(Metric):
+    """Read at scrape time from `collect`, which returns {label values: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Dict[Tuple[str, ...], float]], labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def samples(self):
+        for values, value in self.collect().items():
+            yield "", values, "", value
+
+
+class CounterFunc(Gauge):
+    """A counter someone else keeps, read at scrape time."""
+
+    kind = "counter"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        for values, series in list(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                yield "_bucket", values, f'le="{format_value(bound)}"', cumulative
+            yield "_sum", values, "", series[-1]
+            yield "_count", values, "", cumulative
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, collect: Callable[[], Dict[Tuple[str, ...], float]], labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, collect, labels))
+
+    def counter_func(self, name: str, help: str, collect: Callable[[], Dict[Tuple[str, ...], float]], labels: Sequence[str] = ()) -> CounterFunc:
+        return self.register(CounterFunc(name, help, collect, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> bytes:
+        lines: List[str] = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # One broken collector must not take the whole scrape down
+                lines.append(f"# {metric.name} collection failed: {escape(str(e))}")
+        return ("\n".join(lines) + "\n").encode()
+
+
+class RequestMetrics:
+    """ASGI middleware timing every HTTP request by route template, method and status.
+
+    Adds two clock reads and one histogram update per request; the route
+    template comes from the `route` FastAPI stores in the scope while routing.
+    """
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            self.histogram.observe(time.perf_counter() - started, path, scope["method"], str(status[0]))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command the driver runs (pass as an `event_listeners` entry)."""
+
+    def __init__(self, histogram: Histogram, failures: Counter):
+        self.histogram = histogram
+        self.failures = failures
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.histogram.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        self.histogram.observe(event.duration_micros / 1e6, event.command_name)
+        self.failures.inc(event.command_name)
+
+
+class StackSampler:
+    """Statistical profiler for the event loop thread, switchable at runtime.
+
+    While running, a daemon thread snapshots the target thread's stack every
+    `interval` seconds and counts collapsed stacks ("outer;...;inner"), the
+    input format of flamegraph tools. Nothing is added to the request path.
+    """
+
+    def __init__(self, max_depth: int = 64):
+        self.max_depth = max_depth
+        self.interval = 0.01
+        self.stacks: "collections.Counter[str]" = collections.Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.01, thread_id: Optional[int] = None):
+        self.stop()
+        self.interval = interval
+        self._target = thread_id or threading.get_ident()
+        self.stacks.clear()
+        self.samples = 0
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int = 25) -> List[dict]:
+        """Hottest functions by self samples (innermost frame), with their total (anywhere on the stack) share."""
+        own: "collections.Counter[str]" = collections.Counter()
+        total: "collections.Counter[str]" = collections.Counter()
+        for stack, count in list(self.stacks.items()):
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        samples = max(self.samples, 1)
+        return [
+            {"function": frame, "selfPct": round(count * 100 / samples, 1), "totalPct": round(total[frame] * 100 / samples, 1)}
+            for frame, count in own.most_common(limit)
+        ]
@@ -0,0 +1,202 @@
+import asyncio
+import csv
+import json
+import os
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from history import STATUS_CODES
+
+# Placeholder telemetry a site shows until its first successful fetch
+BASELINE_COLUMNS = ("waveHeight", "windSpeed", "seaTemperature", "visibility", "pressure", "humidity", "tide")
+BASELINE_DEFAULTS = {"waveHeight": 1.0, "windSpeed": 15.0, "seaTemperature": 28.0, "visibility": 10.0, "pressure": 1010, "humidity": 75, "tide": 1.0}
+INTEGER_COLUMNS = {"pressure", "humidity"}
+
+
+class RegistryError(ValueError):
+    pass
+
+
+class Site:
+    """A registered site's text fields; its numbers live in the registry's columns at `index`."""
+
+    __slots__ = ("id", "name", "region", "sunrise", "sunset", "index")
+
+    def __init__(self, id: str, name: str, region: str, sunrise: str, sunset: str, index: int):
+        self.id = id
+        self.name = name
+        self.region = region
+        self.sunrise = sunrise
+        self.sunset = sunset
+        self.index = index
+
+
+class LocationRegistry:
+    """Every site we cover, loaded from a CSV or JSON-lines file.
+
+    Sites are `__slots__` records with an id -> index map; coordinates and the
+    baseline telemetry are NumPy columns, so memory per site and lookup cost
+    stay flat as the list grows to thousands of landing centers. A registry is
+    never mutated: reloading builds a new one and `diff` says what changed.
+
+    The refresh scheduler still holds a full record dict per site (a `seed`
+    until the first fetch), and those dicts, not the registry, dominate
+    per-site memory.
+    """
+
+    def __init__(self, rows: List[dict], path: Optional[str] = None):
+        self.path = path
+        self.sites: List[Site] = []
+        self.index: Dict[str, int] = {}
+        count = len(rows)
+        self.lat = np.empty(count)
+        self.lng = np.empty(count)
+        self.baseline = {column: np.empty(count, dtype=np.float32) for column in BASELINE_COLUMNS}
+        self.status = np.zeros(count, dtype=np.uint8)
+
+        for i, row in enumerate(rows):
+            where = f"{path or 'registry'} row {i + 1}"
+            site_id = str(row.get("id") or "").strip()
+            if not site_id:
+                raise RegistryError(f"{where}: missing id")
+            if site_id in self.index:
+                raise RegistryError(f"{where}: duplicate id {site_id!r}")
+            try:
+                lat, lng = float(row["lat"]), float(row["lng"])
+                for column in BASELINE_COLUMNS:
+                    value = row.get(column)
+                    self.baseline[column][i] = float(value) if value not in (None, "") else BASELINE_DEFAULTS[column]
+            except (KeyError, TypeError, ValueError) as e:
+                raise RegistryError(f"{where}: bad or missing number ({str(e)})")
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                raise RegistryError(f"{where}: coordinates out of range")
+            status = row.get("status") or STATUS_CODES[0]
+            if status not in STATUS_CODES:
+                raise RegistryError(f"{where}: unknown status {status!r}")
+
+            self.index[site_id] = i
+            self.lat[i], self.lng[i] = lat, lng
+            self.status[i] = STATUS_CODES.index(status)
+            self.sites.append(Site(
+                site_id,
+                str(row.get("name") or site_id),
+                str(row.get("region") or ""),
+                str(row.get("sunrise") or ""),
+                str(row.get("sunset") or ""),
+                i,
+            ))
+
+    @classmethod
+    def load(cls, path: str) -> "LocationRegistry":
+        """Reads `.csv` (header row) or `.jsonl`/`.ndjson` (one object per line)."""
+        with open(path, newline="", encoding="utf-8") as data:
+            if path.endswith((".jsonl", ".ndjson")):
+                rows = [json.loads(line) for line in data if line.strip()]
+            else:
+                rows = list(csv.DictReader(data))
+        return cls(rows, path)
+
+    def __len__(self) -> int:
+        return len(self.sites)
+
+    def __iter__(self) -> Iterator[Site]:
+        return iter(self.sites)
+
+    def __contains__(self, site_id: str) -> bool:
+        return site_id in self.index
+
+    def get(self, site_id: str) -> Optional[Site]:
+        i = self.index.get(site_id)
+        return self.sites[i] if i is not None else None
+
+    def position(self, site: Site) -> Tuple[float, float]:
+        return float(self.lat[site.index]), float(self.lng[site.index])
+
+    def metadata(self, site: Site) -> dict:
+        """The fields the registry owns; refreshed telemetry never overrides these."""
+        lat, lng = self.position(site)
+        return {"id": site.id, "name": site.name, "region": site.region, "lat": lat, "lng": lng}
+
+    def seed(self, site: Site) -> dict:
+        """A full location record with baseline telemetry, for sites that have never been fetched."""
+        record = self.metadata(site)
+        for column in BASELINE_COLUMNS:
+            value = float(self.baseline[column][site.index])
+            record[column] = int(value) if column in INTEGER_COLUMNS else round(value, 2)
+        record.update({
+            "sunrise": site.sunrise,
+            "sunset": site.sunset,
+            "status": STATUS_CODES[self.status[site.index]],
+            "advisory": "",
+            "windDirection": 0.0,
+            "waveDirection": 0.0,
+        })
+        return record
+
+    def diff(self, newer: "LocationRegistry") -> Tuple[List[str], List[str], List[str]]:
+        """(added, removed, changed) ids going from this registry to `newer`."""
+        added = [site.id for site in newer if site.id not in self.index]
+        removed = [site.id for site in self if site.id not in newer.index]
+        changed = [
+            site.id for site in newer
+            if site.id in self.index and self.metadata(self.get(site.id)) != newer.metadata(site)
+        ]
+        return added, removed, changed
+
+
+class RegistryWatcher:
+    """Polls the registry file and hands a freshly loaded registry to `on_change`.
+
+    A file that fails to parse is reported and ignored; the running registry
+    stays in place until a valid version is saved.
+    """
+
+    def __init__(
+        self,
+        registry: LocationRegistry,
+        on_change: Callable[[LocationRegistry, LocationRegistry], Awaitable[None]],
+        interval: float = 10.0,
+    ):
+        self.registry = registry
+        self.on_change = on_change
+        self.interval = interval
+        self._mtime = self._stat()
+        self._task: Optional[asyncio.Task] = None
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.registry.path).st_mtime
+        except (OSError, TypeError):
+            return None
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def check(self):
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return
+        self._mtime = mtime
+        try:
+            newer = await asyncio.to_thread(LocationRegistry.load, self.registry.path)
+        except (OSError, ValueError, csv.Error) as e:
+            print(f"Ignoring invalid location registry {self.registry.path}: {str(e)}")
+            return
+        previous, self.registry = self.registry, newer
+        await self.on_change(previous, newer)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"Location registry reload failed: {str(e)}")
@@ -0,0 +1,103 @@
+import gzip
+import hashlib
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+# Brotli is optional; without it clients simply get the gzip variant
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_BYTES = 512
+
+
+class CachedResponse:
+    """Encoded JSON body with its precompressed variants and strong ETag."""
+
+    __slots__ = ("body", "variants", "etag", "expires_at")
+
+    def __init__(self, body: bytes, expires_at: float = float("inf")):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.expires_at = expires_at
+        self.variants: Dict[str, bytes] = {}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.variants["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body, quality=5)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates)
+
+
+def preferred_encoding(accept_encoding: str, variants: Dict[str, bytes]) -> Optional[str]:
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    for encoding in ("br", "gzip"):
+        if encoding in variants and encoding in accepted:
+            return encoding
+    return None
+
+
+class ResponseCache:
+    """Keeps encoded response bodies per resource and view, rebuilt only after invalidation.
+
+    `build(resource, view)` returns the JSON bytes and the epoch time they expire at
+    (e.g. when a record turns stale), or None when the resource does not exist.
+    Invalidating a resource drops every view of it at once.
+    """
+
+    def __init__(self, build: Callable[[str, str], Optional[Tuple[bytes, float]]], max_views: int = 16):
+        self.build = build
+        self.max_views = max_views
+        self.entries: Dict[str, Dict[str, CachedResponse]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, *resources: str):
+        if not resources:
+            self.entries.clear()
+        for resource in resources:
+            self.entries.pop(resource, None)
+
+    def get(self, resource: str, view: str = "full") -> Optional[CachedResponse]:
+        views = self.entries.get(resource)
+        entry = views.get(view) if views else None
+        if entry is not None and entry.expires_at > time.time():
+            self.hits += 1
+            return entry
+        self.misses += 1
+        built = self.build(resource, view)
+        if built is None:
+            self.entries.pop(resource, None)
+            return None
+        entry = CachedResponse(*built)
+        views = self.entries.setdefault(resource, {})
+        # Bound ad-hoc field projections so arbitrary combinations can't grow the cache
+        if view in views or len(views) < self.max_views:
+            views[view] = entry
+        return entry
+
+    def respond(self, request: Request, resource: str, view: str = "full", media_type: str = "application/json") -> Optional[Response]:
+        """Serves a cached entry as a 200/304 response, or None if the resource is missing."""
+        entry = self.get(resource, view)
+        if entry is None:
+            return None
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+
+        encoding = preferred_encoding(request.headers.get("accept-encoding", ""), entry.variants)
+        if encoding is None:
+            return Response(content=entry.body, media_type=media_type, headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(content=entry.variants[encoding], media_type=media_type, headers=headers)
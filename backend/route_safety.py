@@ -0,0 +1,165 @@
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hazard import NO_DATA, HazardField, classify
+from history import STATUS_CODES
+from spatial import KM_PER_DEGREE
+
+DECISIONS = ("GO", "CAUTION", "NO GO")
+# Seconds; departure times are rounded down to this before scoring
+DEPARTURE_QUANTUM = 300
+# Limits on one request: a day-trip boat's longest sensible route, and samples across all routes
+MAX_ROUTE_KM = 1000.0
+MAX_REQUEST_SAMPLES = 100_000
+
+
+def route_lengths_km(routes: Sequence[Sequence[Tuple[float, float]]]) -> np.ndarray:
+    """Polyline lengths, measured the same way sample_routes measures them."""
+    lengths = []
+    for route in routes:
+        vertices = np.asarray(route, dtype=np.float64)
+        dlat = np.diff(vertices[:, 0])
+        dlng = np.diff(vertices[:, 1]) * np.cos(np.radians(vertices[1:, 0]))
+        lengths.append(float(np.hypot(dlat, dlng).sum() * KM_PER_DEGREE))
+    return np.array(lengths)
+
+
+def sample_routes(routes: Sequence[Sequence[Tuple[float, float]]], spacing_km: float):
+    """Resamples every polyline at <= `spacing_km` intervals in one batch.
+
+    Returns (lat, lng, along_km, offsets, totals): flat sample arrays for all
+    routes, where route i owns samples offsets[i]:offsets[i + 1].
+    """
+    lengths = np.array([len(route) for route in routes])
+    vertices = np.concatenate([np.asarray(route, dtype=np.float64) for route in routes])
+    first = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    last = first + lengths - 1
+
+    # Leg lengths, zeroed where one route ends and the next begins
+    dlat = np.diff(vertices[:, 0], prepend=vertices[0, 0])
+    dlng = np.diff(vertices[:, 1], prepend=vertices[0, 1]) * np.cos(np.radians(vertices[:, 0]))
+    legs = np.hypot(dlat, dlng) * KM_PER_DEGREE
+    legs[first] = 0.0
+    cumulative = np.cumsum(legs)
+    totals = cumulative[last] - cumulative[first]
+
+    counts = np.maximum(np.ceil(totals / spacing_km).astype(np.int64), 1) + 1
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    route_of_sample = np.repeat(np.arange(len(routes)), counts)
+    ramp = np.arange(offsets[-1]) - offsets[:-1][route_of_sample]
+    along = ramp * (totals / (counts - 1))[route_of_sample]
+
+    # Locate each sample's leg and interpolate along it
+    target = along + cumulative[first][route_of_sample]
+    leg = np.searchsorted(cumulative, target, side="left")
+    leg = np.clip(leg, first[route_of_sample] + 1, last[route_of_sample])
+    span = cumulative[leg] - cumulative[leg - 1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(span > 0, (target - cumulative[leg - 1]) / span, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    lat = vertices[leg - 1, 0] + t * (vertices[leg, 0] - vertices[leg - 1, 0])
+    lng = vertices[leg - 1, 1] + t * (vertices[leg, 1] - vertices[leg - 1, 1])
+    return lat, lng, along, offsets, totals
+
+
+class RouteEvaluator:
+    """Scores planned trips against the hazard field, with a cache keyed on quantized geometry."""
+
+    def __init__(self, field: HazardField, spacing_km: float = 1.0, quantum: float = 0.01, cache_size: int = 4096):
+        self.field = field
+        self.spacing_km = spacing_km
+        self.quantum = quantum
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[tuple, dict]" = OrderedDict()
+
+    def _key(self, route: Sequence[Tuple[float, float]], departure: float, speed_kmh: float) -> tuple:
+        geometry = tuple((round(lat / self.quantum), round(lng / self.quantum)) for lat, lng in route)
+        return (geometry, departure, round(speed_kmh, 1), self.field.version)
+
+    def conditions(self, lat: np.ndarray, lng: np.ndarray, times: np.ndarray):
+        """(wave, wind, class) per sample at its arrival time.
+
+        Samples use the harbors' hourly forecast for that time, and the current
+        field where no forecast covers it (past departures, beyond the horizon).
+        """
+        field = self.field
+        min_lat, min_lng, _, _ = field.bounds
+        row = np.floor((lat - min_lat) / field.resolution).astype(np.int64)
+        col = np.floor((lng - min_lng) / field.resolution).astype(np.int64)
+        inside = (row >= 0) & (row < field.rows) & (col >= 0) & (col < field.cols)
+        cells = np.where(inside, row * field.cols + col, 0)
+        wave = np.where(inside, field.wave[cells], np.nan)
+        wind = np.where(inside, field.wind[cells], np.nan)
+        if field.hourly and inside.any():
+            forecast_wave, forecast_wind = field.forecast(cells[inside], times[inside])
+            known = np.isfinite(forecast_wave)
+            wave[inside] = np.where(known, forecast_wave, wave[inside])
+            wind[inside] = np.where(known, forecast_wind, wind[inside])
+        classes = np.where(inside, classify(wave, wind, field.caution, field.do_not_go), NO_DATA)
+        return wave, wind, classes
+
+    def sample_count(self, lengths_km: np.ndarray) -> int:
+        """Samples sample_routes would produce for routes of these lengths."""
+        return int((np.maximum(np.ceil(lengths_km / self.spacing_km), 1) + 1).sum())
+
+    def evaluate(self, routes: List[List[Tuple[float, float]]], departure: float, speed_kmh: float) -> List[dict]:
+        self.field.ensure_built()
+        # Departures within the same few minutes share cached results
+        departure = departure // DEPARTURE_QUANTUM * DEPARTURE_QUANTUM
+        keys = [self._key(route, departure, speed_kmh) for route in routes]
+        results: List[Optional[dict]] = [self.cache.get(key) for key in keys]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            lat, lng, along, offsets, totals = sample_routes([routes[i] for i in pending], self.spacing_km)
+            times = departure + along / speed_kmh * 3600
+            wave, wind, classes = self.conditions(lat, lng, times)
+            for j, i in enumerate(pending):
+                span = slice(offsets[j], offsets[j + 1])
+                results[i] = self._score(lat[span], lng[span], along[span], wave[span], wind[span], classes[span], totals[j], speed_kmh)
+                self.cache[keys[i]] = results[i]
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return results
+
+    def _score(self, lat, lng, along, wave, wind, classes, total_km: float, speed_kmh: float) -> dict:
+        unknown = classes == NO_DATA
+        severity = np.where(unknown, -1, classes.astype(np.int16))
+        limit_wave, limit_wind = self.field.do_not_go
+        # Rank samples within the worst class by how close they are to the DO NOT GO limits
+        score = severity * 10 + np.nan_to_num(np.maximum(wave / limit_wave, wind / limit_wind), nan=0.0)
+        worst = int(np.argmax(score))
+        worst_class = int(severity[worst])
+
+        step_km = total_km / max(len(along) - 1, 1)
+        hazard_steps = int(np.count_nonzero((severity >= 1)[1:]))
+        decision = DECISIONS[2] if worst_class == 2 else DECISIONS[1] if worst_class == 1 or unknown.any() else DECISIONS[0]
+
+        result = {
+            "decision": decision,
+            "distanceKm": round(float(total_km), 2),
+            "etaMinutes": round(float(total_km / speed_kmh * 60), 1),
+            "timeInHazardMinutes": round(hazard_steps * step_km / speed_kmh * 60, 1),
+            "unknownFraction": round(float(unknown.mean()), 3),
+            "worstSegment": None,
+        }
+        if worst_class >= 0:
+            # Widen the worst sample to the contiguous run of samples in the same class
+            same = severity == worst_class
+            start = worst
+            while start > 0 and same[start - 1]:
+                start -= 1
+            end = worst
+            while end < len(same) - 1 and same[end + 1]:
+                end += 1
+            result["worstSegment"] = {
+                "status": STATUS_CODES[worst_class],
+                "fromKm": round(float(along[start]), 2),
+                "toKm": round(float(along[end]), 2),
+                "lat": round(float(lat[worst]), 4),
+                "lng": round(float(lng[worst]), 4),
+                "maxWaveHeight": round(float(np.nanmax(wave[start:end + 1])), 2),
+                "maxWindSpeed": round(float(np.nanmax(wind[start:end + 1])), 1),
+            }
+        return result
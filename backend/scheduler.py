@@ -0,0 +1,185 @@
+import asyncio
+import datetime
+import heapq
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+# Hazardous harbors are refreshed earlier within their TTL window
+TTL_FACTOR = {"DO NOT GO": 0.5, "Caution": 0.75}
+STATUS_PRIORITY = {"DO NOT GO": 0, "Caution": 1}
+
+
+def parse_iso(value: str) -> float:
+    """Epoch seconds for an ISO 8601 time, honoring its offset; naive times are UTC. Raises ValueError."""
+    parsed = datetime.datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_timestamp(value: Optional[str]) -> float:
+    """Converts an ISO `updatedAt` stamp into epoch seconds (0 when missing or unreadable)."""
+    if not value:
+        return 0.0
+    try:
+        return parse_iso(value)
+    except ValueError:
+        return 0.0
+
+
+class RefreshScheduler:
+    """Keeps every harbor's telemetry fresh by re-fetching it once its TTL runs out.
+
+    Locations sit in a heap ordered by their next due time, so the stalest (and,
+    through a shorter TTL, the most hazardous) harbors are refreshed first. At most
+    `concurrency` fetches run at once and concurrent refreshes of the same location
+    share a single upstream call.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[dict], Awaitable[dict]],
+        ttl: float = 900.0,
+        concurrency: int = 8,
+        retry_after: float = 60.0,
+    ):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.retry_after = retry_after
+        self.state: Dict[str, dict] = {}
+        self.listeners: List[Callable[[Optional[dict], dict], Awaitable[None]]] = []
+        self._next_due: Dict[str, float] = {}
+        self._failures: Dict[str, int] = {}
+        self._heap: List[tuple] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: Callable[[Optional[dict], dict], Awaitable[None]]):
+        """Registers a coroutine called with (previous, current) after each refresh."""
+        self.listeners.append(listener)
+
+    def load(self, records: Iterable[dict]):
+        """Seeds the in-process state without fetching; due times follow `updatedAt`."""
+        for loc in records:
+            self.state[loc["id"]] = loc
+            self._schedule(loc["id"], self._due_after_success(loc))
+
+    def _due_after_success(self, loc: dict) -> float:
+        factor = TTL_FACTOR.get(loc.get("status"), 1.0)
+        return parse_timestamp(loc.get("updatedAt")) + self.ttl * factor
+
+    def _schedule(self, location_id: str, due: float):
+        self._next_due[location_id] = due
+        priority = STATUS_PRIORITY.get(self.state[location_id].get("status"), 2)
+        heapq.heappush(self._heap, (due, priority, location_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def stale_at(self, loc: dict) -> float:
+        """Epoch time the record turns stale (0 if it has never been refreshed)."""
+        updated = parse_timestamp(loc.get("updatedAt"))
+        return updated + self.ttl if updated else 0.0
+
+    def is_stale(self, loc: dict, now: Optional[float] = None) -> bool:
+        return (now or time.time()) > self.stale_at(loc)
+
+    def annotate(self, loc: dict, now: Optional[float] = None) -> dict:
+        """Returns a copy of the record carrying its current staleness flag."""
+        annotated = dict(loc)
+        annotated["stale"] = self.is_stale(loc, now)
+        return annotated
+
+    async def refresh(self, location_id: str) -> Optional[dict]:
+        """Refreshes one location, joining an in-flight refresh if there is one (None if it is no longer tracked)."""
+        pending = self._inflight.get(location_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._refresh(location_id))
+            self._inflight[location_id] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(location_id, None))
+        return await asyncio.shield(pending)
+
+    async def _refresh(self, location_id: str) -> Optional[dict]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            # The site may have been removed from the registry while this refresh was queued
+            previous = self.state.get(location_id)
+            if previous is None:
+                return None
+            try:
+                updated = await self.fetch(previous)
+            except Exception as e:
+                print(f"Refresh failed for {location_id}: {str(e)}")
+                # Keep whatever is tracked now, which may have been replaced while the fetch ran
+                updated = self.state.get(location_id, previous)
+
+        if location_id not in self.state:
+            return updated
+        if updated.get("updatedAt") != previous.get("updatedAt"):
+            self._failures.pop(location_id, None)
+            due = self._due_after_success(updated)
+        else:
+            # Upstream fell back to last-known values, retry with a doubling delay capped at the TTL
+            failures = self._failures.get(location_id, 0)
+            self._failures[location_id] = failures + 1
+            due = time.time() + min(self.retry_after * 2 ** failures, self.ttl)
+
+        self.state[location_id] = updated
+        self._schedule(location_id, due)
+        await self._notify(previous, updated)
+        return updated
+
+    async def _notify(self, previous: Optional[dict], current: dict):
+        for listener in self.listeners:
+            try:
+                await listener(previous, current)
+            except Exception as e:
+                print(f"Refresh listener failed for {current['id']}: {str(e)}")
+
+    async def apply(self, loc: dict):
+        """Takes a record another process refreshed as if this one had fetched it."""
+        previous = self.state.get(loc["id"])
+        self.state[loc["id"]] = loc
+        self._failures.pop(loc["id"], None)
+        self._schedule(loc["id"], self._due_after_success(loc))
+        await self._notify(previous, loc)
+
+    def remove(self, location_id: str) -> Optional[dict]:
+        """Stops tracking a location; its heap entries are skipped once `_next_due` forgets it."""
+        self._next_due.pop(location_id, None)
+        self._failures.pop(location_id, None)
+        return self.state.pop(location_id, None)
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, location_id = heapq.heappop(self._heap)
+                # Skip heap entries superseded by a later reschedule
+                if self._next_due.get(location_id) != due or location_id in self._inflight:
+                    continue
+                asyncio.ensure_future(self.refresh(location_id))
+
+            timeout = self._heap[0][0] - now if self._heap else self.ttl
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0.5))
+            except asyncio.TimeoutError:
+                pass
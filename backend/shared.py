@@ -0,0 +1,257 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+
+def encode(record: dict) -> bytes:
+    return zlib.compress(json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode(), 1)
+
+
+def decode(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob))
+
+
+def default_local_path() -> str:
+    # tmpfs when available, so the store lives in shared memory rather than on disk
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "marine-telemetry.db")
+
+
+class LocalSharedStore:
+    """Telemetry shared by the worker processes on one host, in a memory-mapped SQLite file.
+
+    WAL mode lets any number of readers run alongside the single writer, and
+    `mmap_size` serves reads straight from the mapped pages. Every write bumps
+    a global sequence number so readers can ask for "everything since N".
+    """
+
+    def __init__(self, path: Optional[str] = None, mmap_bytes: int = 256 * 1024 * 1024):
+        self.path = path or default_local_path()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(f"PRAGMA mmap_size={int(mmap_bytes)}")
+        with self._lock:
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS records (id TEXT PRIMARY KEY, seq INTEGER NOT NULL, body BLOB NOT NULL);
+                CREATE INDEX IF NOT EXISTS records_seq ON records (seq);
+                CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL);
+                """
+            )
+
+    def _put(self, records: List[dict]):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM records").fetchone()[0]
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO records (id, seq, body) VALUES (?, ?, ?)",
+                    [(record["id"], seq + i + 1, encode(record)) for i, record in enumerate(records)],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _changes(self, since: int) -> Tuple[List[dict], int]:
+        with self._lock:
+            rows = self._db.execute("SELECT seq, body FROM records WHERE seq > ? ORDER BY seq", (since,)).fetchall()
+        return [decode(body) for _, body in rows], rows[-1][0] if rows else since
+
+    def _try_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT owner, expires FROM leases WHERE name = ?", (name,)).fetchone()
+                held = row is None or row[0] == owner or row[1] < now
+                if held:
+                    self._db.execute("INSERT OR REPLACE INTO leases (name, owner, expires) VALUES (?, ?, ?)", (name, owner, now + ttl))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return held
+
+    def _release(self, name: str, owner: str):
+        with self._lock:
+            self._db.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    async def put(self, records: List[dict]):
+        await asyncio.to_thread(self._put, records)
+
+    async def changes(self, since: int) -> Tuple[List[dict], int]:
+        return await asyncio.to_thread(self._changes, since)
+
+    async def try_lease(self, name: str, owner: str, ttl: float) -> bool:
+        return await asyncio.to_thread(self._try_lease, name, owner, ttl)
+
+    async def release(self, name: str, owner: str):
+        await asyncio.to_thread(self._release, name, owner)
+
+
+class MongoSharedStore:
+    """The same contract across hosts, on MongoDB: a sequenced telemetry collection plus leases.
+
+    A batch reserves its sequence numbers up front, but its unordered bulk
+    write lands in any order. The counter's `committed` high-water mark only
+    moves once the whole batch is written, and readers never look past it, so
+    a follower cannot skip over records that are still being written.
+    """
+
+    def __init__(self, db):
+        self.records = db.telemetry_sync
+        self.counters = db.counters
+        self.leases = db.leases
+
+    async def ensure_indexes(self):
+        await self.records.create_index("seq")
+
+    async def put(self, records: List[dict]):
+        counter = await self.counters.find_one_and_update(
+            {"_id": "telemetry_sync"}, {"$inc": {"value": len(records)}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        first = counter["value"] - len(records) + 1
+        await self.records.bulk_write(
+            [UpdateOne({"_id": record["id"]}, {"$set": {"seq": first + i, "record": record}}, upsert=True) for i, record in enumerate(records)],
+            ordered=False,
+        )
+        # The lease keeps writers one at a time, so batches commit in reservation order
+        await self.counters.update_one({"_id": "telemetry_sync"}, {"$max": {"committed": counter["value"]}})
+
+    async def changes(self, since: int) -> Tuple[List[dict], int]:
+        counter = await self.counters.find_one({"_id": "telemetry_sync"}) or {}
+        committed = counter.get("committed", 0)
+        records, last = [], since
+        if committed <= since:
+            return records, last
+        # A record rewritten past the mark meanwhile is picked up on a later poll
+        async for doc in self.records.find({"seq": {"$gt": since, "$lte": committed}}).sort("seq", 1):
+            records.append(doc["record"])
+            last = doc["seq"]
+        return records, last
+
+    async def try_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        try:
+            await self.leases.find_one_and_update(
+                {"_id": name, "$or": [{"owner": owner}, {"expires": {"$lt": now}}]},
+                {"$set": {"owner": owner, "expires": now + ttl}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # The lease exists and is held by someone else, so the upsert tried to insert a second one
+            return False
+        return True
+
+    async def release(self, name: str, owner: str):
+        await self.leases.delete_one({"_id": name, "owner": owner})
+
+
+class SharedSync:
+    """Lets many API processes share one refresher.
+
+    Whoever holds the `lease_name` lease is the leader: it runs the refresh
+    scheduler and its refreshed records (handed over through `offer`) are
+    written to the shared store in batches. Every process, leader included,
+    pulls records newer than its cursor and passes them to `apply`. A leader
+    that cannot renew its lease steps down before the lease can expire.
+    """
+
+    def __init__(
+        self,
+        store,
+        apply: Callable[[List[dict]], Awaitable[None]],
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        interval: float = 0.5,
+        lease_ttl: float = 15.0,
+        lease_name: str = "refresher",
+    ):
+        self.store = store
+        self.apply = apply
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.interval = interval
+        self.lease_ttl = lease_ttl
+        self.lease_name = lease_name
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.cursor = 0
+        self.pending: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def offer(self, loc: dict):
+        if self.is_leader:
+            self.pending[loc["id"]] = loc
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.is_leader:
+            await self._flush()
+            self.is_leader = False
+            await self.store.release(self.lease_name, self.owner)
+
+    async def _renew(self):
+        try:
+            held = await self.store.try_lease(self.lease_name, self.owner, self.lease_ttl)
+        except Exception as e:
+            print(f"Lease renewal failed: {str(e)}")
+            held = False
+        if held and not self.is_leader:
+            self.is_leader = True
+            print(f"{self.owner} is now the telemetry refresher.")
+            await self.on_elected()
+        elif not held and self.is_leader:
+            self.is_leader = False
+            self.pending.clear()
+            print(f"{self.owner} lost the refresher lease.")
+            await self.on_demoted()
+
+    async def _flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        try:
+            await self.store.put(list(batch.values()))
+        except BaseException:
+            # Retry on the next tick unless demoted meanwhile; records offered since are newer and win
+            if self.is_leader:
+                batch.update(self.pending)
+                self.pending = batch
+            raise
+
+    async def _run(self):
+        renew_at = 0.0
+        while True:
+            try:
+                if time.monotonic() >= renew_at:
+                    renew_at = time.monotonic() + self.lease_ttl / 3
+                    await self._renew()
+                await self._flush()
+                records, self.cursor = await self.store.changes(self.cursor)
+                if records:
+                    await self.apply(records)
+            except Exception as e:
+                print(f"Shared telemetry sync failed: {str(e)}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import struct
+import time
+import zlib
+from typing import Callable, Iterable, List, Optional
+
+# magic, format version, CRC32 of the compressed payload, saved-at epoch seconds
+HEADER = struct.Struct("<4sBId")
+MAGIC = b"MSNP"
+VERSION = 1
+
+
+class SnapshotStore:
+    """Last good telemetry for every location, kept in one compressed file on local disk.
+
+    Loading is a single read plus zlib/JSON decode, fast enough to do before the
+    server accepts connections. Writes go to a temp file that replaces the old
+    snapshot atomically, so a crash mid-write never leaves a torn file behind.
+    """
+
+    def __init__(self, path: str, level: int = 6):
+        self.path = path
+        self.level = level
+        self.saved_at: Optional[float] = None
+
+    def load(self) -> List[dict]:
+        """Records from the last snapshot, or [] when there is none or it is unreadable."""
+        try:
+            with open(self.path, "rb") as snapshot:
+                data = snapshot.read()
+            magic, version, checksum, saved_at = HEADER.unpack_from(data)
+            payload = data[HEADER.size:]
+            if magic != MAGIC or version != VERSION or zlib.crc32(payload) != checksum:
+                raise ValueError("unrecognized or corrupt snapshot")
+            records = json.loads(zlib.decompress(payload))
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            print(f"Ignoring telemetry snapshot {self.path}: {str(e)}")
+            return []
+        self.saved_at = saved_at
+        return records
+
+    def save(self, records: Iterable[dict]):
+        payload = zlib.compress(json.dumps(list(records), separators=(",", ":"), ensure_ascii=False).encode(), self.level)
+        saved_at = time.time()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as snapshot:
+            snapshot.write(HEADER.pack(MAGIC, VERSION, zlib.crc32(payload), saved_at))
+            snapshot.write(payload)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(tmp_path, self.path)
+        self.saved_at = saved_at
+
+
+class SnapshotWriter:
+    """Rewrites the snapshot at most every `interval` seconds while records keep changing."""
+
+    def __init__(self, store: SnapshotStore, records: Callable[[], List[dict]], interval: float = 30.0):
+        self.store = store
+        self.records = records
+        self.interval = interval
+        self.dirty = False
+        self._task: Optional[asyncio.Task] = None
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stops the writer and flushes any unsaved changes."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        try:
+            # Encoding and fsync stay off the event loop
+            await asyncio.to_thread(self.store.save, self.records())
+        except Exception as e:
+            self.dirty = True
+            print(f"Failed to write telemetry snapshot {self.store.path}: {str(e)}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
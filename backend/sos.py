@@ -0,0 +1,254 @@
+import asyncio
+import datetime
+import random
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from spatial import haversine_km
+
+
+class SmsGateway:
+    """Notification gateway interface; implementations deliver one alert to responders."""
+
+    async def send(self, alert: dict):
+        raise NotImplementedError
+
+
+class ConsoleSmsGateway(SmsGateway):
+    """Local stand-in gateway that prints the SMS instead of sending it."""
+
+    async def send(self, alert: dict):
+        print("=" * 40)
+        print("🚨 [MOCK SMS ALERT SENT] 🚨")
+        print(f"To: {alert['contactNumber']}")
+        print(f"Location: Lat {alert['lat']}, Lng {alert['lng']}")
+        print(f"Message: {alert['message']}")
+        print("=" * 40)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class SosPipeline:
+    """Acknowledges SOS alerts immediately and does the slow work in the background.
+
+    `submit` dedups by idempotency key and merges repeats from the same contact
+    in the same area into the open alert (alerts stop being open `merge_window`
+    after their last press). New alerts, merges and each alert's dispatch
+    latency are written to storage in batches; new alerts are handed to a pool
+    of notification workers.
+    Failed writes and sends are retried with capped, jittered exponential
+    backoff until they succeed, and a repeat press for an alert that has not
+    been delivered yet dispatches it again right away.
+
+    Idempotency keys and open alerts live in this process only: behind several
+    uvicorn workers, a resend that lands on another worker is not deduplicated.
+    """
+
+    def __init__(
+        self,
+        # Called with (new alerts, alerts with merged presses or a recorded dispatch latency)
+        store: Callable[[List[dict], List[dict]], Awaitable[None]],
+        gateway: SmsGateway,
+        workers: int = 4,
+        batch_size: int = 100,
+        batch_interval: float = 0.2,
+        merge_window: float = 600.0,
+        merge_radius_km: float = 5.0,
+        idempotency_ttl: float = 86400.0,
+        retry_base: float = 1.0,
+        retry_max: float = 300.0,
+    ):
+        self.store = store
+        self.gateway = gateway
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.merge_window = merge_window
+        self.merge_radius_km = merge_radius_km
+        self.idempotency_ttl = idempotency_ttl
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        # By contact number, least recently pressed first
+        self.open_alerts: "OrderedDict[str, dict]" = OrderedDict()
+        self.idempotency: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.latencies: deque = deque(maxlen=1000)
+        self.counts = {"received": 0, "merged": 0, "replayed": 0, "dispatched": 0, "failed": 0, "writeFailures": 0}
+        # Undelivered alerts waiting out a send backoff, by alert id
+        self.retrying: Dict[str, asyncio.TimerHandle] = {}
+        self._ingest: Optional[asyncio.Queue] = None
+        self._dispatch: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        self._ingest = asyncio.Queue()
+        self._dispatch = asyncio.Queue()
+        self._tasks = [asyncio.ensure_future(self._write_batches())]
+        self._tasks += [asyncio.ensure_future(self._notify()) for _ in range(self.workers)]
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0.5, 1.0) * min(self.retry_base * 2 ** attempt, self.retry_max)
+
+    async def stop(self, timeout: float = 10.0):
+        """Flushes pending writes and notifications (for up to `timeout` seconds), then stops the workers."""
+        if not self._tasks:
+            return
+        try:
+            # Deliveries queue their latency for writing, so drain them first
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Stopping with {self._ingest.qsize()} SOS writes and {self._dispatch.qsize() + len(self.retrying)} notifications still pending.")
+        for handle in self.retrying.values():
+            handle.cancel()
+        self.retrying.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _drain(self):
+        await self._dispatch.join()
+        await self._ingest.join()
+
+    def _expire_open(self, now: float):
+        while self.open_alerts:
+            oldest = next(iter(self.open_alerts.values()))
+            if now - oldest["_lastSeen"] < self.merge_window:
+                break
+            del self.open_alerts[oldest["contactNumber"]]
+
+    def _remember(self, key: str, alert_id: str, now: float):
+        self.idempotency[key] = (now, alert_id)
+        while self.idempotency:
+            oldest_key, (seen, _) = next(iter(self.idempotency.items()))
+            if now - seen < self.idempotency_ttl:
+                break
+            del self.idempotency[oldest_key]
+
+    def submit(self, contact_number: str, lat: float, lng: float, message: str, idempotency_key: Optional[str] = None) -> Tuple[str, bool]:
+        """Queues an alert and returns (alert_id, duplicate) without waiting on storage or SMS."""
+        now = time.time()
+        if idempotency_key:
+            seen = self.idempotency.get(idempotency_key)
+            if seen is not None and now - seen[0] < self.idempotency_ttl:
+                self.counts["replayed"] += 1
+                return seen[1], True
+
+        self.counts["received"] += 1
+        timestamp = datetime.datetime.utcnow().isoformat() + "Z"
+        self._expire_open(now)
+        existing = self.open_alerts.get(contact_number)
+        if (
+            existing is not None
+            and haversine_km(lat, lng, existing["lat"], existing["lng"]) <= self.merge_radius_km
+        ):
+            # Same boat resending from the same area: fold into the open alert
+            existing.update({"lat": lat, "lng": lng, "message": message, "lastSeen": timestamp, "_lastSeen": now})
+            existing["repeatCount"] += 1
+            self.open_alerts.move_to_end(contact_number)
+            self.counts["merged"] += 1
+            self._ingest.put_nowait(("update", existing))
+            handle = self.retrying.pop(existing["alert_id"], None)
+            if handle is not None:
+                # Never delivered: the new press shouldn't wait out the backoff
+                handle.cancel()
+                self._dispatch.put_nowait(existing)
+            if idempotency_key:
+                self._remember(idempotency_key, existing["alert_id"], now)
+            return existing["alert_id"], True
+
+        alert = {
+            "alert_id": str(ObjectId()),
+            "contactNumber": contact_number,
+            "lat": lat,
+            "lng": lng,
+            "message": message,
+            "timestamp": timestamp,
+            "lastSeen": timestamp,
+            "repeatCount": 0,
+            "_lastSeen": now,
+            "_received": time.monotonic(),
+            "_attempts": 0,
+        }
+        # Replaces any alert from this contact elsewhere, which is then no longer open
+        self.open_alerts.pop(contact_number, None)
+        self.open_alerts[contact_number] = alert
+        self._ingest.put_nowait(("insert", alert))
+        self._dispatch.put_nowait(alert)
+        if idempotency_key:
+            self._remember(idempotency_key, alert["alert_id"], now)
+        return alert["alert_id"], False
+
+    async def _write_batches(self):
+        while True:
+            batch = [await self._ingest.get()]
+            deadline = time.monotonic() + self.batch_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._ingest.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            inserts = [alert for kind, alert in batch if kind == "insert"]
+            inserted = {id(alert) for alert in inserts}
+            # Updates to an alert from this same batch are already covered by its insert
+            updates = list({id(alert): alert for kind, alert in batch if kind == "update" and id(alert) not in inserted}.values())
+            attempt = 0
+            while True:
+                try:
+                    # The store upserts, so retrying a partly applied batch is safe
+                    await self.store(inserts, updates)
+                    break
+                except Exception as e:
+                    self.counts["writeFailures"] += 1
+                    delay = self._backoff(attempt)
+                    attempt += 1
+                    print(f"Failed to persist {len(batch)} SOS alert updates, retrying in {delay:.1f}s: {str(e)}")
+                    await asyncio.sleep(delay)
+            for _ in batch:
+                self._ingest.task_done()
+
+    async def _notify(self):
+        while True:
+            alert = await self._dispatch.get()
+            try:
+                await self.gateway.send(alert)
+                latency = time.monotonic() - alert["_received"]
+                self.latencies.append(latency)
+                alert["dispatchLatencyMs"] = round(latency * 1000, 1)
+                self.counts["dispatched"] += 1
+                self._ingest.put_nowait(("update", alert))
+            except Exception as e:
+                self.counts["failed"] += 1
+                delay = self._backoff(alert["_attempts"])
+                alert["_attempts"] += 1
+                print(f"SOS notification failed for {alert['alert_id']}, retrying in {delay:.1f}s: {str(e)}")
+                self.retrying[alert["alert_id"]] = asyncio.get_running_loop().call_later(delay, self._retry, alert)
+            finally:
+                self._dispatch.task_done()
+
+    def _retry(self, alert: dict):
+        if self.retrying.pop(alert["alert_id"], None) is not None:
+            self._dispatch.put_nowait(alert)
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            **self.counts,
+            "pendingWrites": self._ingest.qsize() if self._ingest else 0,
+            "pendingNotifications": self._dispatch.qsize() if self._dispatch else 0,
+            "retryingNotifications": len(self.retrying),
+            "dispatchLatencyMs": {
+                name: round(value * 1000, 1) if value is not None else None
+                for name, value in (("p50", percentile(latencies, 0.5)), ("p95", percentile(latencies, 0.95)), ("max", latencies[-1] if latencies else None))
+            },
+        }
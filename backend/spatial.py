@@ -0,0 +1,140 @@
+import heapq
+import math
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """Uniform lat/lng grid (a fixed-precision geohash) over point ids.
+
+    Inserts and moves are O(1) and queries only visit the cells that overlap the
+    search area, so cost tracks the local density rather than the registry size.
+    """
+
+    def __init__(self, cell_deg: float = 0.25):
+        self.cell_deg = cell_deg
+        self.cells: Dict[Tuple[int, int], Set[str]] = {}
+        self.points: Dict[str, Tuple[float, float]] = {}
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def upsert(self, point_id: str, lat: float, lng: float):
+        previous = self.points.get(point_id)
+        if previous == (lat, lng):
+            return
+        if previous is not None:
+            self.remove(point_id)
+        self.points[point_id] = (lat, lng)
+        self.cells.setdefault(self._cell(lat, lng), set()).add(point_id)
+
+    def remove(self, point_id: str):
+        position = self.points.pop(point_id, None)
+        if position is None:
+            return
+        cell = self._cell(*position)
+        members = self.cells[cell]
+        members.discard(point_id)
+        if not members:
+            del self.cells[cell]
+
+    def _cells_in(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> Iterator[Set[str]]:
+        lo_row, lo_col = self._cell(min_lat, min_lng)
+        hi_row, hi_col = self._cell(max_lat, max_lng)
+        if (hi_row - lo_row + 1) * (hi_col - lo_col + 1) > len(self.cells):
+            # Huge boxes: walking the occupied cells is cheaper than the empty grid
+            for (row, col), members in self.cells.items():
+                if lo_row <= row <= hi_row and lo_col <= col <= hi_col:
+                    yield members
+            return
+        for row in range(lo_row, hi_row + 1):
+            for col in range(lo_col, hi_col + 1):
+                members = self.cells.get((row, col))
+                if members:
+                    yield members
+
+    def within_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[str]:
+        found = []
+        for members in self._cells_in(min_lat, min_lng, max_lat, max_lng):
+            for point_id in members:
+                lat, lng = self.points[point_id]
+                if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                    found.append(point_id)
+        return found
+
+    def within_radius(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, str]]:
+        """(distance_km, id) pairs within `radius_km`, nearest first."""
+        dlat = radius_km / KM_PER_DEGREE
+        dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(min(89.0, abs(lat) + dlat))), 1e-6))
+        found = []
+        for members in self._cells_in(lat - dlat, lng - dlng, lat + dlat, lng + dlng):
+            for point_id in members:
+                distance = haversine_km(lat, lng, *self.points[point_id])
+                if distance <= radius_km:
+                    found.append((distance, point_id))
+        found.sort()
+        return found
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 1,
+        predicate: Optional[Callable[[str], bool]] = None,
+    ) -> List[Tuple[float, str]]:
+        """k nearest (distance_km, id) pairs, searching outward ring by ring of cells.
+
+        Once the rings would cover more cells than are occupied, the remaining
+        occupied cells are scanned directly, so queries far from every point stay cheap.
+        """
+        center_row, center_col = self._cell(lat, lng)
+        best: List[Tuple[float, str]] = []  # max-heap of the k best via negated distances
+        visited = 0
+        ring = 0
+
+        def consider(members: Set[str]):
+            for point_id in members:
+                if predicate is not None and not predicate(point_id):
+                    continue
+                distance = haversine_km(lat, lng, *self.points[point_id])
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, point_id))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, point_id))
+
+        while visited < len(self.points):
+            if len(best) == k:
+                # Anything in this ring or beyond is at least this far away
+                reach = (ring - 1) * self.cell_deg
+                lng_scale = math.cos(math.radians(min(89.0, abs(lat) + ring * self.cell_deg)))
+                if reach * KM_PER_DEGREE * lng_scale > -best[0][0]:
+                    break
+            if (2 * ring + 1) ** 2 > len(self.cells):
+                # Far from every harbor: walking the occupied cells beats widening rings over empty grid
+                for (row, col), members in self.cells.items():
+                    if max(abs(row - center_row), abs(col - center_col)) >= ring:
+                        consider(members)
+                break
+            for row in range(center_row - ring, center_row + ring + 1):
+                edge = row in (center_row - ring, center_row + ring)
+                cols = range(center_col - ring, center_col + ring + 1) if edge else (center_col - ring, center_col + ring)
+                for col in cols:
+                    members = self.cells.get((row, col))
+                    if members:
+                        visited += len(members)
+                        consider(members)
+            ring += 1
+        return sorted((-neg, point_id) for neg, point_id in best)
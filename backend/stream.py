@@ -0,0 +1,132 @@
+import asyncio
+import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+# Fields never streamed as diffs: forecasts are fetched separately, alerts are sent as `newAlerts`
+STREAM_EXCLUDED_FIELDS = {"forecast14", "hourly", "alerts", "updatedAt", "version", "position", "_id"}
+
+
+def alert_key(alert: dict) -> tuple:
+    return (alert.get("headline"), alert.get("effective"), alert.get("areas"))
+
+
+def diff_location(previous: Optional[dict], current: dict) -> Optional[dict]:
+    """Builds a push event with only what changed between two versions of a location.
+
+    Returns None when nothing clients care about changed (e.g. only `updatedAt`).
+    """
+    previous = previous or {}
+    changes = {
+        field: value
+        for field, value in current.items()
+        if field not in STREAM_EXCLUDED_FIELDS and previous.get(field) != value
+    }
+    seen_alerts = {alert_key(alert) for alert in previous.get("alerts") or []}
+    new_alerts = [alert for alert in current.get("alerts") or [] if alert_key(alert) not in seen_alerts]
+    if not changes and not new_alerts:
+        return None
+
+    event = {
+        "type": "location",
+        "id": current["id"],
+        "lat": current["lat"],
+        "lng": current["lng"],
+        "updatedAt": current.get("updatedAt"),
+        "version": current.get("version"),
+        "changes": changes,
+    }
+    if "status" in changes and previous.get("status"):
+        event["statusChange"] = {"from": previous["status"], "to": current["status"]}
+    if new_alerts:
+        event["newAlerts"] = new_alerts
+    return event
+
+
+class Subscription:
+    """One connected client: its filter and a bounded queue of pending events."""
+
+    __slots__ = ("ids", "bbox", "queue", "overflowed")
+
+    def __init__(self, ids: Optional[Set[str]], bbox: Optional[Tuple[float, float, float, float]], queue_size: int):
+        self.ids = ids
+        self.bbox = bbox
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def in_region(self, event: dict) -> bool:
+        if self.bbox is None:
+            return True
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        return min_lat <= event["lat"] <= max_lat and min_lng <= event["lng"] <= max_lng
+
+    def offer(self, event: dict):
+        if self.queue.full():
+            # Slow client: drop the oldest event and ask it to resync instead of buffering forever
+            self.queue.get_nowait()
+            self.overflowed = True
+        self.queue.put_nowait(event)
+
+    async def next_event(self, timeout: float) -> Optional[dict]:
+        """Next event to deliver, a resync notice after an overflow, or None on timeout."""
+        if self.overflowed:
+            self.overflowed = False
+            return {"type": "resync", "at": datetime.datetime.utcnow().isoformat() + "Z"}
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class StatusHub:
+    """Fans location change events out to subscribed SSE/WebSocket clients.
+
+    Subscriptions to explicit ids are indexed by id; the rest (fleet-wide or
+    region) are checked per event. Publishing never blocks on a slow client.
+    """
+
+    def __init__(self, queue_size: int = 64):
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscription] = set()
+        self.by_id: Dict[str, Set[Subscription]] = {}
+        self.unfiltered: Set[Subscription] = set()
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def subscribe(self, ids: Optional[Set[str]] = None, bbox: Optional[Tuple[float, float, float, float]] = None) -> Subscription:
+        sub = Subscription(ids or None, bbox, self.queue_size)
+        self.subscribers.add(sub)
+        self._attach(sub)
+        return sub
+
+    def update(self, sub: Subscription, ids: Optional[Set[str]], bbox: Optional[Tuple[float, float, float, float]]):
+        self._detach(sub)
+        sub.ids, sub.bbox = ids or None, bbox
+        self._attach(sub)
+
+    def _attach(self, sub: Subscription):
+        if sub.ids:
+            for location_id in sub.ids:
+                self.by_id.setdefault(location_id, set()).add(sub)
+        else:
+            self.unfiltered.add(sub)
+
+    def unsubscribe(self, sub: Subscription):
+        self.subscribers.discard(sub)
+        self._detach(sub)
+
+    def _detach(self, sub: Subscription):
+        self.unfiltered.discard(sub)
+        for location_id in sub.ids or ():
+            subs = self.by_id.get(location_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self.by_id[location_id]
+
+    def publish(self, event: dict):
+        targets: List[Subscription] = list(self.by_id.get(event["id"], ()))
+        targets.extend(self.unfiltered)
+        for sub in targets:
+            if sub.in_region(event):
+                sub.offer(event)
@@ -0,0 +1,157 @@
+import bisect
+import time
+from typing import Dict, List, Optional, Tuple
+
+from history import STATUS_CODES
+
+# MessagePack is optional; without it the sync endpoint only speaks JSON
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Fetched through their own endpoints, or internal to the server
+SYNC_EXCLUDED_FIELDS = {"forecast14", "hourly", "position", "_id", "version"}
+
+# Fixed-point scales for the binary encoding: the value sent is round(value * scale)
+QUANTIZE_SCALES = {
+    "lat": 100000,
+    "lng": 100000,
+    "waveHeight": 100,
+    "windSpeed": 10,
+    "windDirection": 1,
+    "waveDirection": 1,
+    "seaTemperature": 10,
+    "visibility": 10,
+    "tide": 100,
+}
+
+
+class SyncLog:
+    """Versions every location record so clients can ask for what changed since a token.
+
+    The refresher stamps each record with a version: a millisecond clock that
+    never goes backwards, so versions keep increasing across restarts and
+    leader changes. Records that arrive already stamped, e.g. from a shared
+    cache leader, keep their version. The log remembers which fields changed
+    at which version and keeps tombstones for removed sites, so a delta costs
+    as much as what changed since the token. It only knows changes made after
+    `floor`, the newest version at startup. An older token gets a full reset.
+    """
+
+    def __init__(self, records: Dict[str, dict]):
+        self.records = records
+        self.version = 0
+        self.floor = 0
+        self.fields: Dict[str, Dict[str, int]] = {}
+        self.tombstones: Dict[str, int] = {}
+        self.latest: Dict[str, int] = {}
+        # (version, id) in version order; entries superseded in `latest` are skipped
+        self._log: List[Tuple[int, str]] = []
+
+    def _next_version(self) -> int:
+        self.version = max(self.version + 1, int(time.time() * 1000))
+        return self.version
+
+    def start(self):
+        """Marks the records loaded so far as the baseline this log can diff from."""
+        self.version = max([self.version] + [loc.get("version") or 0 for loc in self.records.values()])
+        for loc in self.records.values():
+            # Sites never fetched (or saved before versioning) still need a version to sync from
+            if not loc.get("version"):
+                loc["version"] = self._next_version()
+        self.floor = self.version
+
+    def _record(self, location_id: str, version: int):
+        self.latest[location_id] = version
+        if self._log and self._log[-1][0] > version:
+            bisect.insort(self._log, (version, location_id))
+        else:
+            self._log.append((version, location_id))
+        if len(self._log) > 2 * len(self.latest) + 64:
+            self._log = [(v, i) for v, i in self._log if self.latest.get(i) == v]
+
+    def stamp(self, previous: Optional[dict], current: dict) -> bool:
+        """Versions `current` if any synced field changed; returns whether it did."""
+        previous = previous or {}
+        changed = [
+            field for field, value in current.items()
+            if field not in SYNC_EXCLUDED_FIELDS and previous.get(field) != value
+        ]
+        adopted = (current.get("version") or 0) > (previous.get("version") or 0)
+        if not changed and not adopted:
+            return False
+        if adopted:
+            version = current["version"]
+            self.version = max(self.version, version)
+        else:
+            version = current["version"] = self._next_version()
+        fields = self.fields.setdefault(current["id"], {})
+        for field in changed:
+            fields[field] = version
+        self.tombstones.pop(current["id"], None)
+        self._record(current["id"], version)
+        return True
+
+    def remove(self, location_id: str):
+        version = self._next_version()
+        self.fields.pop(location_id, None)
+        self.tombstones[location_id] = version
+        self._record(location_id, version)
+
+    def changes(self, since: int) -> Optional[dict]:
+        """Records and fields changed after `since` plus removed ids, or None when nothing changed.
+
+        Tokens from before `floor` (including 0) get every record in full with `reset` set.
+        """
+        if since < self.floor:
+            return {
+                "version": self.version,
+                "reset": True,
+                "changed": [sync_fields(loc) for loc in self.records.values()],
+                "removed": [],
+            }
+        if since >= self.version:
+            return None
+        changed, removed = [], []
+        for version, location_id in self._log[bisect.bisect_left(self._log, (since + 1,)):]:
+            if self.latest.get(location_id) != version:
+                continue
+            if location_id in self.tombstones:
+                removed.append(location_id)
+                continue
+            loc = self.records.get(location_id)
+            if loc is None:
+                continue
+            delta = {"id": location_id}
+            for field, field_version in self.fields.get(location_id, {}).items():
+                if field_version > since and field in loc:
+                    delta[field] = loc[field]
+            changed.append(delta)
+        return {"version": self.version, "changed": changed, "removed": removed}
+
+
+def sync_fields(loc: dict) -> dict:
+    return {field: value for field, value in loc.items() if field not in SYNC_EXCLUDED_FIELDS}
+
+
+def quantize(delta: dict) -> dict:
+    packed = {}
+    for field, value in delta.items():
+        scale = QUANTIZE_SCALES.get(field)
+        if scale is not None and isinstance(value, (int, float)):
+            packed[field] = int(round(value * scale))
+        elif field == "status" and value in STATUS_CODES:
+            packed[field] = STATUS_CODES.index(value)
+        else:
+            packed[field] = value
+    return packed
+
+
+def encode_msgpack(changes: dict) -> bytes:
+    """Packs a sync result with quantized numbers; a reset also carries the scales and status codes."""
+    payload = dict(changes, changed=[quantize(delta) for delta in changes["changed"]])
+    if changes.get("reset"):
+        payload["scales"] = QUANTIZE_SCALES
+        payload["statusCodes"] = list(STATUS_CODES)
+    return msgpack.packb(payload, use_bin_type=True)
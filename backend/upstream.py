@@ -0,0 +1,188 @@
+import asyncio
+import random
+import time
+from typing import Optional
+
+import httpx
+
+# HTTP/2 needs the optional `h2` package (installed via httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class UpstreamError(Exception):
+    """Raised when an upstream call fails after all retries (or is short-circuited)."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+class TokenBucket:
+    """Async token bucket that spaces calls out to `rate` per second with a `burst` allowance."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and lets a probe through after `reset_after` seconds.
+
+    While half-open only one probe is out at a time; a probe that never reports
+    back (e.g. its caller was cancelled) is given up on after another `reset_after`.
+    """
+
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state != "half-open":
+            return state == "closed"
+        now = time.monotonic()
+        if self.probe_at is not None and now - self.probe_at < self.reset_after:
+            return False
+        self.probe_at = now
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probe_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        self.probe_at = None
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """Shared, connection-pooled client for a JSON provider such as WeatherAPI.com.
+
+    Every call goes through a global concurrency limit and token-bucket rate
+    limiter, is retried with jittered exponential backoff on 429/5xx/transport
+    errors, and is short-circuited while the provider is failing. A `Retry-After`
+    longer than `max_retry_after` is not waited out: the call fails at once and
+    counts towards opening the circuit, so callers never hold a slot for hours.
+    """
+
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        base_url: str,
+        max_concurrency: int = 16,
+        rate: float = 10.0,
+        burst: int = 20,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10.0,
+        max_retry_after: float = 30.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_retry_after = max_retry_after
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2_AVAILABLE,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        # Full jitter keeps retrying workers from synchronizing
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    async def get_json(self, path: str, params: dict) -> dict:
+        if not self.breaker.allow():
+            raise CircuitOpenError("Upstream circuit is open")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        last_error = UpstreamError("Upstream call was not attempted")
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            async with self._semaphore:
+                await self.bucket.acquire()
+                try:
+                    res = await self.client.get(path, params=params)
+                except httpx.TransportError as e:
+                    last_error = UpstreamError(f"{type(e).__name__}: {str(e)}")
+                else:
+                    if res.status_code == 200:
+                        self.breaker.record_success()
+                        return res.json()
+                    last_error = UpstreamError(f"Upstream returned {res.status_code}", res.status_code)
+                    if res.status_code not in self.RETRYABLE_STATUS:
+                        # Client errors (bad key, bad query) show the provider is up, and settle a half-open probe
+                        self.breaker.record_success()
+                        raise last_error
+                    retry_after = res.headers.get("Retry-After")
+            if attempt < self.retries:
+                delay = self._delay(attempt, retry_after)
+                if delay > self.max_retry_after:
+                    break
+                await asyncio.sleep(delay)
+
+        self.breaker.record_failure()
+        raise last_error
@@ -0,0 +1,109 @@
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from hazard import classify
+from history import STATUS_CODES, to_iso
+
+HOUR = 3600
+
+
+def safe_runs(classes: np.ndarray) -> List[Tuple[int, int]]:
+    """(first_hour, end_hour) index pairs of consecutive SAFE TO GO hours."""
+    safe = np.concatenate(([False], classes == 0, [False]))
+    edges = np.flatnonzero(np.diff(safe.astype(np.int8)))
+    return list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+
+class DepartureWindows:
+    """Per-harbor hourly safety timeline and safe departure windows, precomputed on refresh.
+
+    Each refresh classifies every forecast hour in one vectorized pass and keeps
+    the resulting windows plus a fleet-wide index sorted by window start, so the
+    read endpoints only slice precomputed data.
+    """
+
+    def __init__(self, caution: Tuple[float, float], do_not_go: Tuple[float, float]):
+        self.caution = caution
+        self.do_not_go = do_not_go
+        self.timelines: Dict[str, dict] = {}
+        # (window_start, window_end, location_id), sorted by start
+        self.opening: List[Tuple[int, int, str]] = []
+        self.version = 0
+
+    def update(self, loc: dict):
+        hourly = loc.get("hourly")
+        if not hourly or not hourly.get("waveHeight"):
+            return
+        start = int(hourly["start"])
+        wave = np.asarray(hourly["waveHeight"], dtype=np.float64)
+        wind = np.asarray(hourly["windSpeed"], dtype=np.float64)
+        classes = classify(wave, wind, self.caution, self.do_not_go)
+        windows = [(start + first * HOUR, start + end * HOUR) for first, end in safe_runs(classes)]
+
+        previous = self.timelines.get(loc["id"])
+        if previous is not None:
+            self.opening = [entry for entry in self.opening if entry[2] != loc["id"]]
+        for window_start, window_end in windows:
+            bisect.insort(self.opening, (window_start, window_end, loc["id"]))
+        self.timelines[loc["id"]] = {
+            "start": start,
+            "classes": classes,
+            "windows": windows,
+            "windowEnds": [end for _, end in windows],
+        }
+        self.version += 1
+
+    def remove(self, location_id: str):
+        if self.timelines.pop(location_id, None) is not None:
+            self.opening = [entry for entry in self.opening if entry[2] != location_id]
+            self.version += 1
+
+    def next_boundary(self, now: float, location_id: Optional[str] = None) -> float:
+        """When the next forecast hour begins, i.e. when a cached view of the timeline goes out of date."""
+        if location_id in self.timelines:
+            starts = [self.timelines[location_id]["start"]]
+        else:
+            starts = [timeline["start"] for timeline in self.timelines.values()]
+        return min((now + HOUR - (now - start) % HOUR for start in starts), default=now + HOUR)
+
+    def timeline(self, location_id: str, now: float) -> Optional[dict]:
+        timeline = self.timelines.get(location_id)
+        if timeline is None:
+            return None
+        # Skip the hours and windows that are already over
+        first_hour = max(0, int((now - timeline["start"]) // HOUR))
+        first_window = bisect.bisect_right(timeline["windowEnds"], now)
+        hours = [
+            {"time": to_iso(timeline["start"] + i * HOUR), "status": STATUS_CODES[code] if code < len(STATUS_CODES) else None}
+            for i, code in enumerate(timeline["classes"][first_hour:].tolist(), start=first_hour)
+        ]
+        windows = [
+            {"start": to_iso(start), "end": to_iso(end), "hours": (end - start) // HOUR}
+            for start, end in timeline["windows"][first_window:]
+        ]
+        return {
+            "id": location_id,
+            "openNow": bool(windows) and timeline["windows"][first_window][0] <= now,
+            "nextWindow": windows[0] if windows else None,
+            "windows": windows,
+            "hourly": hours,
+        }
+
+    def opening_within(self, now: float, hours: float) -> List[dict]:
+        """Harbors with a safe window that is open now or opens within `hours`, soonest first."""
+        horizon = now + hours * HOUR
+        cutoff = bisect.bisect_right(self.opening, (horizon, float("inf"), ""))
+        found: Dict[str, dict] = {}
+        # Sorted by start, so the first live window seen per harbor is its earliest
+        for start, end, location_id in self.opening[:cutoff]:
+            if end <= now or location_id in found:
+                continue
+            found[location_id] = {
+                "id": location_id,
+                "opensAt": to_iso(start),
+                "closesAt": to_iso(end),
+                "openNow": start <= now,
+            }
+        return list(found.values())
@@ -83,7 +83,7 @@ export default function MarineMap() {
         const fetchLocations = async () => {
             try {
                 const apiUrl = process.env.NEXT_PUBLIC_API_URL || "http://127.0.0.1:8000";
-                const res = await fetch(`${apiUrl}/api/locations`);
+                const res = await fetch(`${apiUrl}/api/locations?view=summary`);
                 const data = await res.json();
                 setLocations(data);
             } catch (e) {